@@ -0,0 +1,56 @@
+"""
+Фоновое выполнение графа для UI.
+
+Один ход интервью — несколько последовательных вызовов LLM. Чтобы интерфейс не замирал,
+граф запускается в пуле потоков через stream(stream_mode=["updates", "values"]):
+обновления узлов доступны сразу по мере готовности, финальное состояние — по завершении.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from agent.cassette import bind
+
+MAX_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide executor (shared across Streamlit sessions and reruns)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="graph-turn")
+        return _executor
+
+
+class TurnJob:
+    """One graph run on the background executor with node-level progress."""
+
+    def __init__(self, graph, state: Dict[str, Any], config: Optional[Dict[str, Any]] = None):
+        self.updates: List[Tuple[str, Dict[str, Any]]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self._future = get_executor().submit(bind(self._run), graph, state, config)
+
+    def _run(self, graph, state, config):
+        for mode, chunk in graph.stream(state, config=config, stream_mode=["updates", "values"]):
+            if mode == "updates":
+                for node, update in chunk.items():
+                    # list.append атомарен под GIL, UI читает копию через progress()
+                    self.updates.append((node, update or {}))
+            else:
+                self.result = chunk
+        return self.result
+
+    @property
+    def done(self) -> bool:
+        return self._future.done()
+
+    def progress(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return list(self.updates)
+
+    def outcome(self) -> Dict[str, Any]:
+        """Final state; re-raises the exception if the run failed."""
+        return self._future.result()
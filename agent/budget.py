@@ -0,0 +1,142 @@
+"""
+Бюджет сессии интервью: лимит токенов, лимит стоимости и целевая задержка хода.
+
+Губернатор смотрит на фактический расход (state["usage"]) и деградирует ступенями:
+    0 normal         — полный конвейер;
+    1 skip_mentor    — ход без mentor_node, интервьюер работает по общей директиве;
+    2 cheap_summary  — summary обновляется локально, без вызова LLM;
+    3 short_history  — в промпты Ментора/Интервьюера идет только хвост окна сообщений;
+    4 force_report   — жесткий лимит: интервью завершается, строится отчет.
+Каждое решение пишется в лог ходов записью _kind="budget" (см. budget_node в nodes.py).
+
+Лимиты берутся из state["budget"] или из окружения:
+BUDGET_MAX_TOKENS, BUDGET_MAX_COST (USD), BUDGET_TARGET_LATENCY (сек). 0 — без ограничения.
+"""
+import os
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from agent.rate_limit import thread_queue_wait
+
+NORMAL, SKIP_MENTOR, CHEAP_SUMMARY, SHORT_HISTORY, FORCE_REPORT = range(5)
+LEVELS = ["normal", "skip_mentor", "cheap_summary", "short_history", "force_report"]
+
+# Доля израсходованного лимита -> ступень. Отчет принудительно запускается с запасом:
+# сам reporting_node тоже тратит токены, и они должны уложиться в лимит.
+RATIO_THRESHOLDS = [(FORCE_REPORT, 0.9), (SHORT_HISTORY, 0.8), (CHEAP_SUMMARY, 0.65), (SKIP_MENTOR, 0.5)]
+# Превышение целевой задержки хода в N раз -> ступень (отчет по задержке не форсируется)
+LATENCY_THRESHOLDS = [(CHEAP_SUMMARY, 1.5), (SKIP_MENTOR, 1.0)]
+
+SHORT_HISTORY_MESSAGES = 4
+CHEAP_SUMMARY_CHARS = 1500
+
+# Цены gpt-4o-mini, USD за 1M токенов
+PRICE_INPUT_PER_1M = 0.15
+PRICE_OUTPUT_PER_1M = 0.60
+
+SKIP_MENTOR_DIRECTIVE = (
+    "Ментор в этом ходе не вызывался (экономия бюджета сессии). Сам оцени последний ответ кандидата: "
+    "если в нем есть ошибка — коротко поправь, затем задай следующий вопрос по теме позиции."
+)
+BUDGET_STOP_REPLY = (
+    "Мы исчерпали отведенный на это интервью лимит, поэтому на этом остановимся. "
+    "Спасибо за ответы! Сейчас подготовлю итоговый отчет."
+)
+
+
+def default_budget() -> Dict[str, float]:
+    return {
+        "max_tokens": int(os.getenv("BUDGET_MAX_TOKENS", "0")),
+        "max_cost": float(os.getenv("BUDGET_MAX_COST", "0")),
+        "target_latency": float(os.getenv("BUDGET_TARGET_LATENCY", "0")),
+    }
+
+
+def budget_active(budget: Optional[Dict[str, float]]) -> bool:
+    return bool(budget) and any(budget.get(k) for k in ("max_tokens", "max_cost", "target_latency"))
+
+
+def merge_usage(left: Optional[Dict[str, float]], right: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Reducer for state["usage"]: counters are summed, last_* gauges are overwritten."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        if key.startswith("last_"):
+            merged[key] = value
+        else:
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def cost_of(input_tokens: int, output_tokens: int) -> float:
+    return (input_tokens * PRICE_INPUT_PER_1M + output_tokens * PRICE_OUTPUT_PER_1M) / 1_000_000
+
+
+@contextmanager
+def metered():
+    """
+    Collects token usage of all LLM calls inside the block into the yielded dict
+    (filled on exit): {"input_tokens", "output_tokens", "cost", "llm_calls", "queue_wait"}.
+    """
+    usage: Dict[str, float] = {}
+    waited = thread_queue_wait()
+    with get_usage_metadata_callback() as cb:
+        yield usage
+    per_model = cb.usage_metadata.values()
+    input_tokens = sum(u.get("input_tokens", 0) for u in per_model)
+    output_tokens = sum(u.get("output_tokens", 0) for u in per_model)
+    usage.update(
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost=cost_of(input_tokens, output_tokens),
+        llm_calls=1,
+        queue_wait=thread_queue_wait() - waited,
+    )
+
+
+def decide(budget: Optional[Dict[str, float]], usage: Optional[Dict[str, float]]) -> Tuple[int, str]:
+    """Returns (level, reason) for the next turn."""
+    if not budget_active(budget):
+        return NORMAL, "бюджет не задан"
+    usage = usage or {}
+    tokens = usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+
+    ratios = []
+    if budget.get("max_tokens"):
+        ratios.append((tokens / budget["max_tokens"], f"токены {tokens}/{int(budget['max_tokens'])}"))
+    if budget.get("max_cost"):
+        ratios.append((usage.get("cost", 0) / budget["max_cost"], f"стоимость ${usage.get('cost', 0):.4f}/${budget['max_cost']}"))
+
+    level, reason = NORMAL, "в пределах бюджета"
+    if ratios:
+        ratio, what = max(ratios)
+        for candidate, threshold in RATIO_THRESHOLDS:
+            if ratio >= threshold:
+                level, reason = candidate, f"{what} ({ratio:.0%})"
+                break
+
+    latency = usage.get("last_turn_latency", 0)
+    if budget.get("target_latency") and latency:
+        slowdown = latency / budget["target_latency"]
+        for candidate, threshold in LATENCY_THRESHOLDS:
+            if slowdown >= threshold and candidate > level:
+                level, reason = candidate, f"задержка хода {latency:.1f}s при цели {budget['target_latency']}s"
+                break
+    return level, reason
+
+
+def history_window(state: Dict[str, Any]) -> list:
+    """Message window for mentor/interviewer prompts (shrunk at short_history and above)."""
+    messages = state['messages']
+    if state.get('budget_level', NORMAL) >= SHORT_HISTORY:
+        return messages[-SHORT_HISTORY_MESSAGES:]
+    return messages
+
+
+def cheap_summary(current_summary: str, last_turn: Dict[str, Any]) -> str:
+    """Local summary update without an LLM call: appends the turn digest, keeps the tail."""
+    question = " ".join(last_turn.get('agent_visible_message', '').split())[:200]
+    answer = " ".join(last_turn.get('user_message', '').split())[:300]
+    summary = f"{current_summary}\nХод {last_turn['turn_id']}: вопрос — {question}; ответ — {answer}"
+    return summary[-CHEAP_SUMMARY_CHARS:]
@@ -0,0 +1,138 @@
+"""
+Запись/воспроизведение вызовов LLM и поиска ("кассеты").
+
+Каждый вызов модели или DuckDuckGo проходит через cassette_call: ключ — хэш запроса
+(тип вызова, схема, сообщения), значение — сериализованный ответ. Режимы:
+    record — всегда живой вызов, ответ записывается (перезаписывается);
+    replay — ответ из кассеты, если есть, иначе живой вызов с записью;
+    strict — только кассета; незаписанный запрос -> CassetteMiss (офлайн-прогоны, CI).
+
+Включение: CASSETTE=path/to/cassette.json CASSETTE_MODE=strict, либо use_cassette(...).
+Активная кассета — контекстная переменная: use_cassette / activate действуют только в своем потоке
+(и в узлах графа, которые LangGraph запускает с копией контекста). Фоновые задачи (prefetch, разделы отчета,
+пополнение банка) получают кассету явно через bind(fn) в момент постановки в очередь.
+Новые записи копятся в памяти и пишутся на диск одним файлом при выходе из use_cassette / activate
+и при завершении процесса (flush), а не после каждого вызова.
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from agent.turn_log import write_json_atomic
+
+MODES = ("record", "replay", "strict")
+
+
+class CassetteMiss(LookupError):
+    """Strict mode: the request is not in the cassette."""
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    payload = json.dumps(request, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}. Expected one of {MODES}.")
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        if mode != "strict":
+            atexit.register(self.flush)
+
+    def call(self, request: Dict[str, Any], fn: Callable[[], Any],
+             dump: Callable[[Any], Any], load: Callable[[Any], Any]) -> Any:
+        key = request_key(request)
+        if self.mode != "record":
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return load(entry["response"])
+            if self.mode == "strict":
+                raise CassetteMiss(f"Запрос {request.get('kind')} ({key[:12]}) не записан в {self.path}")
+
+        self.misses += 1
+        response = fn()
+        with self._lock:
+            self._entries[key] = {"kind": request.get("kind"), "response": dump(response)}
+            self._dirty = True
+        return response
+
+    def flush(self):
+        """Writes the recorded entries to disk (no-op when nothing new was recorded)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            write_json_atomic(self.path, self._entries)
+            self._dirty = False
+
+
+_default: Optional[Cassette] = None
+if os.getenv("CASSETTE"):
+    _default = Cassette(os.environ["CASSETTE"], os.getenv("CASSETTE_MODE", "replay"))
+_active: ContextVar[Optional[Cassette]] = ContextVar("cassette", default=_default)
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active.get()
+
+
+@contextmanager
+def activate(cassette: Optional[Cassette]):
+    """Makes an already loaded cassette active inside the block (None — live calls); new entries are flushed on exit."""
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+        if cassette is not None:
+            cassette.flush()
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps fn for another thread: it runs with the cassette active at bind time, not at run time."""
+    cassette = _active.get()
+
+    def run(*args, **kwargs):
+        token = _active.set(cassette)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _active.reset(token)
+    return run
+
+
+def use_cassette(path: str, mode: str = "replay"):
+    """Activates a cassette for all model/search calls inside the block."""
+    return activate(Cassette(path, mode))
+
+
+def cassette_call(request: Dict[str, Any], fn: Callable[[], Any],
+                  dump: Callable[[Any], Any] = lambda r: r, load: Callable[[Any], Any] = lambda r: r) -> Any:
+    """Runs fn() through the active cassette (or directly when none is active)."""
+    cassette = _active.get()
+    if cassette is None:
+        return fn()
+    return cassette.call(request, fn, dump, load)
+
+
+def serialize_messages(messages) -> list:
+    return [[m.type, m.content] for m in messages]
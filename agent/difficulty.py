@@ -0,0 +1,96 @@
+"""
+Локальный контроллер сложности вопросов.
+
+Оценки Ментора (confidence_score) копятся в состоянии компактным рядом confidence_series,
+по темам — в topic_stats. Контроллер без вызова LLM считает скользящее среднее (EMA) и тренд,
+выбирает уровень сложности следующего вопроса (1-5) и формирует короткую подсказку Интервьюеру.
+Стартовый уровень зависит от целевого грейда.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+DIFFICULTY_NAMES = {1: "базовый", 2: "ниже среднего", 3: "средний", 4: "продвинутый", 5: "экспертный"}
+GRADE_START = {"Junior": 2, "Middle": 3, "Senior": 4}
+MIN_LEVEL, MAX_LEVEL = 1, 5
+
+SERIES_MAX = 50
+EMA_ALPHA = 0.5
+TREND_WINDOW = 3
+UP_SCORE = 75      # EMA выше — усложняем
+DOWN_SCORE = 45    # EMA ниже — упрощаем
+DROP_TREND = -20   # резкое падение оценок — упрощаем даже при высоком EMA
+TOPIC_DONE = (3, 75)   # тема раскрыта: ответов >= 3, среднее >= 75
+TOPIC_WEAK = 50
+
+
+def append_series(left: Optional[List[float]], right: Optional[List[float]]) -> List[float]:
+    """Reducer for state["confidence_series"]: append and keep the last SERIES_MAX scores."""
+    return ((left or []) + (right or []))[-SERIES_MAX:]
+
+
+def start_level(grade_target: Optional[str]) -> int:
+    return GRADE_START.get(grade_target or "", 3)
+
+
+def ema(series: List[float], alpha: float = EMA_ALPHA) -> float:
+    value = series[0]
+    for score in series[1:]:
+        value = alpha * score + (1 - alpha) * value
+    return value
+
+
+def trend(series: List[float], window: int = TREND_WINDOW) -> float:
+    """Average per-turn change over the last `window` scores."""
+    tail = series[-window:]
+    if len(tail) < 2:
+        return 0.0
+    return (tail[-1] - tail[0]) / (len(tail) - 1)
+
+
+def update_topic_stats(stats: Optional[Dict[str, Dict[str, float]]], topic: str, score: float) -> Dict[str, Dict[str, float]]:
+    stats = {k: dict(v) for k, v in (stats or {}).items()}
+    topic = (topic or "").strip().lower()
+    if topic:
+        entry = stats.setdefault(topic, {"n": 0, "mean": 0.0})
+        entry["n"] += 1
+        entry["mean"] = round(entry["mean"] + (score - entry["mean"]) / entry["n"], 1)
+    return stats
+
+
+def next_level(current: int, series: List[float]) -> Tuple[int, float, float]:
+    """Returns (level, ema, trend) for the next question."""
+    if not series:
+        return current, 0.0, 0.0
+    avg, slope = ema(series), trend(series)
+    level = current
+    if avg <= DOWN_SCORE or slope <= DROP_TREND:
+        level = current - 1
+    elif avg >= UP_SCORE and slope >= 0:
+        level = current + 1
+    return max(MIN_LEVEL, min(MAX_LEVEL, level)), avg, slope
+
+
+def difficulty_hint(level: int, avg: float, slope: float,
+                    stats: Dict[str, Dict[str, float]], topic: str) -> str:
+    """Short structured hint for the interviewer prompt."""
+    parts = [f"Сложность следующего вопроса: {level}/{MAX_LEVEL} ({DIFFICULTY_NAMES[level]}); EMA оценок {avg:.0f}, тренд {slope:+.0f}."]
+    current = stats.get((topic or "").strip().lower())
+    if current and current["n"] >= TOPIC_DONE[0] and current["mean"] >= TOPIC_DONE[1]:
+        parts.append(f"Тема «{topic}» раскрыта ({current['n']} отв., ср. {current['mean']:.0f}) — смени тему.")
+    weak = [(v["mean"], k) for k, v in stats.items() if v["mean"] < TOPIC_WEAK and k != (topic or "").strip().lower()]
+    if weak:
+        parts.append(f"Слабая тема: «{min(weak)[1]}» (ср. {min(weak)[0]:.0f}) — можно вернуться позже.")
+    return " ".join(parts)
+
+
+def control(state: Dict[str, Any], score: float, topic: str) -> Dict[str, Any]:
+    """State update after the mentor scored an answer: series, topic stats, next level and hint."""
+    series = append_series(state.get('confidence_series'), [score])
+    stats = update_topic_stats(state.get('topic_stats'), topic, score)
+    current = state.get('difficulty') or start_level((state.get('session_meta') or {}).get('grade_target'))
+    level, avg, slope = next_level(current, series)
+    return {
+        "confidence_series": [score],
+        "topic_stats": stats,
+        "difficulty": level,
+        "difficulty_hint": difficulty_hint(level, avg, slope, stats, topic),
+    }
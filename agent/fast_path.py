@@ -0,0 +1,133 @@
+"""
+Локальный классификатор реплик кандидата перед графом.
+
+Команды остановки, пустой ввод, "мусор" и очевидный off-topic обрабатываются без LLM:
+стоп сразу ведет к отчету, остальное — к заготовленному ответу с повтором вопроса.
+"""
+import re
+from typing import Optional
+
+STOP = "stop"
+EMPTY = "empty"
+GARBAGE = "garbage"
+OFF_TOPIC = "off_topic"
+
+STOP_PHRASES = {
+    "exit", "quit", "stop", "stop interview", "стоп", "стоп интервью", "выход",
+    "стоп игра давай фидбэк", "стоп игра давай фидбек", "закончить интервью",
+    "завершить интервью", "давай фидбэк", "давай фидбек",
+}
+
+# Только целые слова; шутка/анекдот — только вместе с просьбой ("Шутка, на самом деле..." — это ответ)
+JOKE_REQUEST = r"\b(расскажи|расскажите|давай|давайте|пошути|пошутите|знаешь|знаете)\b"
+OFF_TOPIC_PATTERNS = [
+    r"\bпогод[аеуы]\b", r"\bфутбол[аеуы]?\b", r"\bкак (у тебя |у вас )?дела\b",
+    JOKE_REQUEST + r".*\bшутк[аиу]?\b", JOKE_REQUEST + r".*\bанекдот(ы|а)?\b",
+    r"\bчто (ты )?делаешь вечером\b", r"\bweather\b", r"\btell (me )?a joke\b", r"\bhow are you\b",
+]
+OFF_TOPIC_MAX_WORDS = 8
+
+# Просьба закончить своими словами. Обычно ее распознает Ментор (stop_interview_flag); когда губернатор
+# бюджета пропускает Ментора (SKIP_MENTOR), ее проверяет fast path — только короткие реплики целиком о завершении
+STOP_INTENT_PATTERNS = [
+    r"^(давай|давайте|можно|хочу|предлагаю) (уже )?(закончим|закончить|заканчивать|завершим|завершить|остановимся)\b",
+    r"^(хватит|заканчиваем|закончим|завершаем|завершим)\b(?! ли\b)",
+    r"^(let s|lets|can we|i want to) (finish|stop|end)\b", r"^i m done\b", r"^(that s|thats) enough\b",
+]
+STOP_INTENT_MAX_WORDS = 6
+
+STOP_REPLY = "Спасибо за уделенное время! Завершаю интервью и готовлю для вас обратную связь."
+REDIRECT_REPLIES = {
+    EMPTY: "Кажется, ответ не дошел. Давайте вернемся к вопросу: {question}",
+    GARBAGE: "Не удалось разобрать ответ. Сформулируйте, пожалуйста, еще раз. Вопрос был такой: {question}",
+    OFF_TOPIC: "Давайте не будем отвлекаться и вернемся к интервью. {question}",
+}
+
+
+def normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _is_garbage(text: str) -> bool:
+    if not any(ch.isalnum() for ch in text):
+        return True
+    words = text.split()
+    if len(words) != 1:
+        return False
+    letters = [ch for ch in words[0].lower() if ch.isalpha()]
+    # Только "ааааааа" / "ffffff": одиночные термины без гласных (HTTPS, pgsql, BDD/TDD) — обычные ответы
+    return len(letters) >= 5 and len(set(letters)) <= 2
+
+
+def classify_message(text: Optional[str]) -> Optional[str]:
+    """Returns STOP / EMPTY / GARBAGE / OFF_TOPIC, or None if the message needs the full pipeline."""
+    if text is None or not text.strip():
+        return EMPTY
+
+    normalized = normalize(text)
+    if normalized in STOP_PHRASES:
+        return STOP
+    if _is_garbage(text.strip()):
+        return GARBAGE
+    if len(normalized.split()) <= OFF_TOPIC_MAX_WORDS and any(re.search(p, normalized) for p in OFF_TOPIC_PATTERNS):
+        return OFF_TOPIC
+    return None
+
+
+def is_stop_intent(text: Optional[str]) -> bool:
+    """Plain-language request to end the interview (used when the mentor is skipped)."""
+    normalized = normalize(text or "")
+    return (0 < len(normalized.split()) <= STOP_INTENT_MAX_WORDS
+            and any(re.search(p, normalized) for p in STOP_INTENT_PATTERNS))
+
+
+def redirect_reply(kind: str, last_question: str) -> str:
+    question = last_question or "расскажите, пожалуйста, о своем опыте."
+    return REDIRECT_REPLIES[kind].format(question=question)
+
+
+# Регрессионные случаи классификатора: python -m agent.fast_path
+CLASSIFIER_CASES = [
+    ("Стоп интервью.", STOP),
+    ("   ", EMPTY),
+    ("!!!", GARBAGE),
+    ("ааааааа", GARBAGE),
+    ("Какая сегодня погода?", OFF_TOPIC),
+    ("Расскажи шутку", OFF_TOPIC),
+    ("как у вас дела?", OFF_TOPIC),
+    ("Погодите, дайте подумать", None),
+    ("Шутка, на самом деле я не знаю", None),
+    ("HTTPS", None),
+    ("BDD/TDD", None),
+    ("pgsql", None),
+    ("SQL", None),
+]
+STOP_INTENT_CASES = [
+    ("Давайте закончим", True),
+    ("Хватит на сегодня.", True),
+    ("Let's finish here", True),
+    ("I'm done", True),
+    ("Давайте закончим с этим вопросом и перейдем к следующему, я расскажу про индексы", False),
+    ("Закончил проект на Django в прошлом году", False),
+    ("Хватит ли памяти?", False),
+]
+
+
+def main():
+    failed = 0
+    for text, expected in CLASSIFIER_CASES:
+        actual = classify_message(text)
+        if actual != expected:
+            failed += 1
+            print(f"[FAIL] {text!r}: {actual} (ожидалось {expected})")
+    for text, expected in STOP_INTENT_CASES:
+        if is_stop_intent(text) != expected:
+            failed += 1
+            print(f"[FAIL] stop intent {text!r}: {not expected} (ожидалось {expected})")
+    print(f"Случаев: {len(CLASSIFIER_CASES) + len(STOP_INTENT_CASES)}, провалено: {failed}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
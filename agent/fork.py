@@ -0,0 +1,96 @@
+"""
+Форк сессии интервью для what-if сценариев.
+
+fork_session(state, turn_id) возвращает состояние "перед ответом на вопрос хода turn_id":
+ходы 1..turn_id-1 и вопрос хода turn_id. Новый лог содержит только ссылку на родителя
+(copy-on-write, ходы не копируются), поэтому форк дальше стоит лишь вызовов LLM нового хода:
+
+    branch = fork_session(state, turn_id=3)
+    branch["messages"].append(HumanMessage(content="Другой ответ"))
+    branch = build_graph().invoke(branch)
+
+Форкнуть можно перед любым ходом, в том числе после хода fast path (повтор вопроса, off-topic):
+logger_node пишет снимок и для таких ходов. Продолжить сессию после хода-остановки нельзя.
+"""
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.state import WINDOW_SIZE
+from agent.turn_log import append_record, read_opening, read_snapshots, read_turns, start_log
+
+# Приветствие для логов, записанных до появления записи opening
+GREETING = "Здравствуйте, я готов к интервью."
+
+
+def _fork_path(parent_path: str, turn_id: int) -> str:
+    base = parent_path[:-len(".jsonl")] if parent_path.endswith(".jsonl") else parent_path
+    return f"{base}.fork-{turn_id}-{uuid.uuid4().hex[:8]}.jsonl"
+
+
+def fork_session(state: Dict[str, Any], turn_id: int, new_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Snapshots the session right before the candidate answered turn_id
+    (1..current_turn_id + 1) and returns the initial state of a new branch.
+    """
+    parent_path = state.get("turn_log_path")
+    if not parent_path:
+        raise ValueError("Форк возможен только для сессии с turn_log_path.")
+
+    turns = read_turns(parent_path)
+    current = turns[-1]["turn_id"] if turns else 0
+    if not 1 <= turn_id <= current + 1:
+        raise ValueError(f"turn_id должен быть в диапазоне 1..{current + 1}, получено {turn_id}.")
+    if turn_id == current + 1 and state.get("status") in ("stop_requested", "finished"):
+        raise ValueError(f"Сессия остановлена на ходе {current}: форкните ее перед одним из ходов 1..{current}.")
+
+    prefix = [t for t in turns if t["turn_id"] < turn_id]
+    snapshots = [s for s in read_snapshots(parent_path) if s["turn_id"] < turn_id]
+    snapshot = snapshots[-1] if snapshots else {}
+
+    # Вопрос, на который кандидат ответит заново
+    if turn_id <= current:
+        question = next(t for t in turns if t["turn_id"] == turn_id)["agent_visible_message"]
+    else:
+        question = state.get("last_interviewer_question", "")
+
+    opening = read_opening(parent_path)
+    if opening is None and current == 0:
+        # Ни одного хода еще не записано: приветствие есть только в окне сообщений
+        first = (state.get("messages") or [None])[0]
+        opening = first.content if isinstance(first, HumanMessage) else None
+    messages = [HumanMessage(content=opening or GREETING)]
+    for t in prefix:
+        messages += [AIMessage(content=t["agent_visible_message"]), HumanMessage(content=t["user_message"])]
+    messages.append(AIMessage(content=question))
+
+    new_path = new_path or _fork_path(parent_path, turn_id)
+    start_log(new_path)
+    append_record(new_path, "parent", parent_path=os.path.abspath(parent_path), upto_turn_id=turn_id - 1)
+    append_record(parent_path, "fork", fork_path=os.path.abspath(new_path), at_turn_id=turn_id)
+
+    return {
+        "participant_name": state.get("participant_name"),
+        "session_meta": state.get("session_meta"),
+        "budget": state.get("budget"),
+        "messages": messages[-WINDOW_SIZE:],
+        "turn_log_path": new_path,
+        "last_turn": prefix[-1] if prefix else None,
+        "current_turn_id": turn_id - 1,
+        "summary": snapshot.get("summary", "Начало интервью."),
+        "summarized_turn_id": snapshot.get("summarized_turn_id", snapshot.get("turn_id", 0)),
+        "mentor_confidence_score": snapshot.get("mentor_confidence_score", 100.0),
+        "confidence_series": snapshot.get("confidence_series", []),
+        "topic_stats": snapshot.get("topic_stats", {}),
+        "difficulty": snapshot.get("difficulty"),
+        "mentor_directive": None,
+        "mentor_thoughts": f"Форк сессии перед ходом {turn_id}.",
+        "interviewer_thoughts": "",
+        "last_candidate_answer": prefix[-1]["user_message"] if prefix else "",
+        "last_interviewer_question": question,
+        "status": "active",
+        "fast_path": None,
+        "final_feedback": None,
+    }
@@ -1,11 +1,39 @@
 from langgraph.graph import StateGraph, END, START
 from agent.state import InterviewState
-from agent.nodes import mentor_node, interviewer_node, logger_node, reporting_node, memory_update_node
+from agent.nodes import mentor_node, interviewer_node, logger_node, reporting_node, memory_update_node, fast_path_node, budget_node, summary_pending, prefetch_node
+from agent.fast_path import classify_message, is_stop_intent
+from agent.budget import NORMAL, SKIP_MENTOR, FORCE_REPORT
+from agent.prefetch import PREFETCH
+
+def route_entry(state: InterviewState):
+    messages = state.get("messages") or []
+    # Budget governor (budget_node): forced report goes through the fast path stop branch
+    level = state.get("budget_level", NORMAL)
+    if level >= FORCE_REPORT:
+        return "fast_path_node"
+    if messages and classify_message(messages[-1].content):
+        return "fast_path_node"
+    if level >= SKIP_MENTOR:
+        # No mentor to raise stop_interview_flag: a plain "let's finish" is stopped by the fast path
+        if messages and is_stop_intent(messages[-1].content):
+            return "fast_path_node"
+        return "interviewer_node"
+    return "mentor_node"
+
+def route_log(state: InterviewState):
+    # Fast path: no summary update, straight to the report (stop) or end of turn (redirect).
+    # Lazy summary catches up on the pending turns before the report.
+    if state.get("fast_path"):
+        if state.get("status") != "stop_requested":
+            return END
+        return "memory_update_node" if summary_pending(state) else "reporting_node"
+    return "memory_update_node"
 
 def route_memory(state: InterviewState):
     if state.get("status") == "stop_requested":
         return "reporting_node"
-    return END
+    # Candidate is about to type: prepare the next reply in the background
+    return "prefetch_node" if PREFETCH else END
 
 def build_graph():
     builder = StateGraph(InterviewState)
@@ -16,8 +44,24 @@ def build_graph():
     builder.add_node("logger_node", logger_node)
     builder.add_node("memory_update_node", memory_update_node)
     builder.add_node("reporting_node", reporting_node)
+    builder.add_node("fast_path_node", fast_path_node)
+    builder.add_node("budget_node", budget_node)
+    builder.add_node("prefetch_node", prefetch_node)
+    
+    # Every turn starts with the budget governor
+    builder.add_edge(START, "budget_node")
         
-    builder.add_edge(START, "mentor_node")
+    # Stop commands / trivial input skip the LLM pipeline, budget may skip the mentor
+    builder.add_conditional_edges(
+        "budget_node",
+        route_entry,
+        {
+            "fast_path_node": "fast_path_node",
+            "mentor_node": "mentor_node",
+            "interviewer_node": "interviewer_node"
+        }
+    )
+    builder.add_edge("fast_path_node", "logger_node")
     
     # Mentor -> Interviewer (Always flow through Interviewer to acknowledge stop)
     builder.add_edge("mentor_node", "interviewer_node")
@@ -25,18 +69,28 @@ def build_graph():
     # Interviewer -> Logger
     builder.add_edge("interviewer_node", "logger_node")
     
-    # Logger -> Memory Update
-    builder.add_edge("logger_node", "memory_update_node")
+    # Logger -> Memory Update (regular turn) OR Reporting / End (fast path)
+    builder.add_conditional_edges(
+        "logger_node",
+        route_log,
+        {
+            "memory_update_node": "memory_update_node",
+            "reporting_node": "reporting_node",
+            END: END
+        }
+    )
     
-    # Memory Update -> Reporting (if stopping) OR End
+    # Memory Update -> Reporting (if stopping) OR Prefetch (optional) OR End
     builder.add_conditional_edges(
         "memory_update_node",
         route_memory,
         {
             "reporting_node": "reporting_node",
+            "prefetch_node": "prefetch_node",
             END: END
         }
     )
+    builder.add_edge("prefetch_node", END)
     
     # Reporting -> END
     builder.add_edge("reporting_node", END)
@@ -1,5 +1,7 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field
+import copy
+from typing import Any, Dict, List, Optional, Type, Union
+from pydantic import BaseModel, Field, create_model
+from agent.prompts import LEAN_PROMPTS
 
 class MentorOutput(BaseModel):
     internal_thoughts: str = Field(description="Скрытые размышления об ответе кандидата и текущем состоянии. На РУССКОМ языке.")
@@ -8,6 +10,12 @@ class MentorOutput(BaseModel):
     correction_details: Optional[str] = Field(description="Детали исправления, если требуется (для внутренних нужд). На РУССКОМ языке.")
     confidence_score: float = Field(description="Уверенность в оценке ответа (0-100).", ge=0, le=100)
     stop_interview_flag: bool = Field(description="True, если интервью следует остановить (достаточно данных или запрос пользователя).", default=False)
+    topic: str = Field(description="Короткая метка темы последнего вопроса (2-3 слова, например 'SQL индексы'). Одинаковые темы называй одинаково.", default="")
+
+class InterviewerOutput(BaseModel):
+    thought_process: str = Field(description="Internal ReAct process: Understand answer -> Check Directive -> Formulate Plan.")
+    response_text: str = Field(description="The actual response/question to the candidate.")
+    call_mentor: bool = Field(description="True if you need Mentor's help/analysis (e.g. user answered tough question). False if you continue efficiently on your own.", default=True)
 
 class RoadmapItem(BaseModel):
     topic: str = Field(description="Конкретная тема или технология.")
@@ -26,3 +34,68 @@ class FinalFeedback(BaseModel):
     soft_skills_honesty: str = Field(description="Оценка честности / признания незнания. На РУССКОМ языке.")
     soft_skills_engagement: str = Field(description="Оценка вовлеченности. На РУССКОМ языке.")
     personal_roadmap: List[RoadmapItem] = Field(description="Детальный план развития.")
+
+
+# --- Report sections -----------------------------------------------------------
+# Разделы FinalFeedback для параллельной генерации отчета (generate_report в nodes.py).
+# Поля берутся из FinalFeedback как есть, поэтому слияние разделов валидируется той же схемой.
+
+def _section(name: str, doc: str, fields: List[str]) -> Type[BaseModel]:
+    definitions = {f: (FinalFeedback.model_fields[f].annotation, FinalFeedback.model_fields[f]) for f in fields}
+    return create_model(name, __doc__=doc, **definitions)
+
+VerdictSection = _section("VerdictSection", "Вердикт по кандидату.",
+                          ["grade", "hiring_recommendation", "confidence_score"])
+HardSkillsSection = _section("HardSkillsSection", "Анализ hard skills.",
+                             ["confirmed_skills", "knowledge_gaps", "gap_solutions"])
+SoftSkillsSection = _section("SoftSkillsSection", "Анализ soft skills.",
+                             ["soft_skills_clarity", "soft_skills_honesty", "soft_skills_engagement"])
+RoadmapSection = _section("RoadmapSection", "Персональный план развития.", ["personal_roadmap"])
+
+REPORT_SECTIONS = {
+    "verdict": VerdictSection,
+    "hard_skills": HardSkillsSection,
+    "soft_skills": SoftSkillsSection,
+    "roadmap": RoadmapSection,
+}
+
+
+# --- Lean schemas ------------------------------------------------------------
+# Длинные описания полей уходят в схему инструмента на каждом вызове. В lean-режиме
+# описания убираются, остаются только короткие подсказки там, где имя поля неочевидно.
+
+LEAN_FIELD_HINTS = {
+    "internal_thoughts": "Анализ ответа, RU",
+    "directive": "Указание интервьюеру, RU",
+    "correction_details": "Суть ошибки кандидата, RU",
+    "confidence_score": "0-100",
+    "topic": "Тема вопроса, 2-3 слова",
+    "thought_process": "Ход мыслей перед ответом, RU",
+    "response_text": "Реплика кандидату, RU",
+    "call_mentor": "Нужен ли анализ Ментора",
+    "grade": "Junior / Middle / Senior",
+    "gap_solutions": "Верные ответы по пробелам, RU",
+    "resource_link": "Заполняется системой",
+}
+
+def _strip_descriptions(node: Dict[str, Any]):
+    for name, prop in node.get("properties", {}).items():
+        prop.pop("description", None)
+        prop.pop("title", None)
+        if name in LEAN_FIELD_HINTS:
+            prop["description"] = LEAN_FIELD_HINTS[name]
+
+def lean_json_schema(model_cls: Type[BaseModel]) -> Dict[str, Any]:
+    """JSON schema of model_cls with field descriptions reduced to LEAN_FIELD_HINTS."""
+    schema = copy.deepcopy(model_cls.model_json_schema())
+    _strip_descriptions(schema)
+    for definition in schema.get("$defs", {}).values():
+        _strip_descriptions(definition)
+    schema["description"] = model_cls.__name__
+    return schema
+
+def schema_for(model_cls: Type[BaseModel], lean: Optional[bool] = None) -> Union[Type[BaseModel], Dict[str, Any]]:
+    """Schema to pass to with_structured_output: the pydantic class, or its lean JSON schema."""
+    if lean is None:
+        lean = LEAN_PROMPTS
+    return lean_json_schema(model_cls) if lean else model_cls
@@ -1,104 +1,326 @@
 import json
-from langchain_openai import ChatOpenAI
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import List, Optional
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_community.tools import DuckDuckGoSearchResults
 import os
-from agent.state import InterviewState, TurnLog
-from agent.models import MentorOutput, FinalFeedback, RoadmapItem
-from agent.prompts import INTERVIEWER_SYSTEM_PROMPT, MENTOR_SYSTEM_PROMPT, FINAL_REPORT_SYSTEM_PROMPT, DIRECTIVE_CONTEXT_PROMPT, DIRECTIVE_CONTEXT_PROMPT
-
-try:
-    interviewer_model = ChatOpenAI(
-        model="openai/gpt-4o-mini", 
-        api_key=os.getenv("API_KEY"),
-        base_url=os.getenv("BASE_URL"),
-    )
+import time
+from agent.state import InterviewState, TurnLog, WINDOW_SIZE
+from agent.turn_log import append_turn, append_record, require_turn_log, session_turns, read_turns
+from agent.fast_path import classify_message, is_stop_intent, redirect_reply, STOP, STOP_REPLY
+from agent.models import MentorOutput, InterviewerOutput, FinalFeedback, RoadmapItem, REPORT_SECTIONS, schema_for
+from agent.prompts import (
+    get_prompt, LEAN_PROMPTS, PREFETCH_DIRECTIVE, PREFETCH_BRANCH_HINTS, DIFFICULTY_HINT_PROMPT,
+    REPORT_SECTION_INSTRUCTIONS, ROADMAP_FOR_GAPS_PROMPT
+)
+from agent.cassette import bind, cassette_call, serialize_messages
+from agent.budget import (
+    NORMAL, SKIP_MENTOR, CHEAP_SUMMARY, SHORT_HISTORY, FORCE_REPORT, LEVELS,
+    SHORT_HISTORY_MESSAGES, SKIP_MENTOR_DIRECTIVE, BUDGET_STOP_REPLY,
+    default_budget, budget_active, decide, metered, merge_usage, history_window, cheap_summary
+)
+from agent.difficulty import control
+from agent.rate_limit import INTERACTIVE, BACKGROUND, acquire_slot, get_limiter
+from agent.prefetch import PREFETCH, BRANCHES, answer_branch, speculate, claim, discard, collect_usage
 
-    mentor_model = ChatOpenAI(
-        model="openai/gpt-4o-mini",
-        api_key=os.getenv("API_KEY"),
-        base_url=os.getenv("BASE_URL")
-    )
-except Exception as e:
-    print("Ошибка инициализации моделей. Проверьте переменные окружения API_KEY и BASE_URL.")
-    raise e
+MODEL_NAME = "openai/gpt-4o-mini"
 
-search_tool = DuckDuckGoSearchResults()
+# Клиенты моделей и поиск создаются при первом вызове: импорт langchain_openai / langchain_community
+# и их инициализация не входят в холодный старт UI и CLI (см. import_budget.py).
+def _create_model():
+    from langchain_openai import ChatOpenAI
+    try:
+        return ChatOpenAI(
+            model=MODEL_NAME,
+            api_key=os.getenv("API_KEY"),
+            base_url=os.getenv("BASE_URL")
+        )
+    except Exception as e:
+        print("Ошибка инициализации моделей. Проверьте переменные окружения API_KEY и BASE_URL.")
+        raise e
 
-def mentor_node(state: InterviewState):
+@lru_cache(maxsize=None)
+def get_interviewer_model():
+    return _create_model()
+
+@lru_cache(maxsize=None)
+def get_mentor_model():
+    return _create_model()
+
+@lru_cache(maxsize=None)
+def get_search_tool():
+    from langchain_community.tools import DuckDuckGoSearchResults
+    return DuckDuckGoSearchResults()
+
+# Lazy summary: summary обновляется только ходами, выпавшими из окна messages, пачками по LAZY_SUMMARY_BATCH
+# (и один раз перед отчетом). Требует turn_log_path — выпавшие ходы читаются из журнала.
+LAZY_SUMMARY = os.getenv("LAZY_SUMMARY", "0") == "1"
+LAZY_SUMMARY_BATCH = 2
+
+# Отчет по разделам (PARALLEL_REPORT=1): вердикт, hard skills, soft skills и roadmap генерируются параллельно
+# над общим контекстом, поиск ссылок стартует сразу после раздела roadmap. Быстрее по времени, но транскрипт
+# уходит в модель 4 раза — примерно в 4 раза больше входных токенов отчета. По умолчанию — один вызов.
+PARALLEL_REPORT = os.getenv("PARALLEL_REPORT", "0") == "1"
+REPORT_WORKERS = 8
+
+_report_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report")
+
+def invoke_structured(model, schema_cls, messages, session: str = "", priority: int = INTERACTIVE):
     """
-    Mentor agent analysis.
+    Structured call that always returns a schema_cls instance
+    (in lean mode the schema is a plain JSON schema and the model returns a dict).
+    Live calls wait for the shared rate limiter (see rate_limit.py), cassette hits do not.
     """
-    messages = state['messages']
-    candidate_answer = messages[-1].content
+    def call():
+        acquire_slot(session, priority, messages)
+        runnable = model.with_structured_output(schema_for(schema_cls))
+        response = runnable.invoke(messages)
+        if isinstance(response, dict):
+            return schema_cls.model_validate(response)
+        return response
+    
+    request = {
+        "kind": f"structured:{schema_cls.__name__}",
+        "model": getattr(model, "model_name", None),
+        "lean": LEAN_PROMPTS,
+        "messages": serialize_messages(messages)
+    }
+    return cassette_call(request, call, dump=lambda r: r.model_dump(), load=schema_cls.model_validate)
+
+def invoke_text(model, messages, session: str = "", priority: int = BACKGROUND) -> str:
+    """Plain-text model call (summary), returns the message content."""
+    def call():
+        acquire_slot(session, priority, messages)
+        return model.invoke(messages).content
     
+    request = {"kind": "text", "model": getattr(model, "model_name", None), "messages": serialize_messages(messages)}
+    return cassette_call(request, call)
+
+def search_web(query: str) -> str:
+    return cassette_call({"kind": "search", "query": query}, lambda: get_search_tool().invoke(query))
+
+def build_mentor_prompt(state: InterviewState):
+    meta = state['session_meta']
+    system_prompt = get_prompt("MENTOR_SYSTEM_PROMPT").format(
+        participant_name=state['participant_name'],
+        position=meta['position'],
+        grade_target=meta['grade_target'],
+        experience=meta['experience']
+    )
+    return [SystemMessage(content=system_prompt), *history_window(state)]
+
+def build_interviewer_prompt(state: InterviewState):
+    directive = state.get('mentor_directive')
     meta = state['session_meta']
-    participant = state['participant_name']
     
-    system_prompt = MENTOR_SYSTEM_PROMPT.format(
-        participant_name=participant,
+    system_prompt = get_prompt("INTERVIEWER_SYSTEM_PROMPT").format(
         position=meta['position'],
         grade_target=meta['grade_target'],
         experience=meta['experience']
     )
+    
+    messages = [SystemMessage(content=system_prompt)] + history_window(state)
+    
+    if directive:
+         directive_context = get_prompt("DIRECTIVE_CONTEXT_PROMPT").format(directive=directive)
+         messages.append(SystemMessage(content=directive_context))
+    
+    if state.get('difficulty_hint'):
+        messages.append(SystemMessage(content=DIFFICULTY_HINT_PROMPT.format(hint=state['difficulty_hint'])))
+    return messages
+
+def build_prefetch_prompt(state: InterviewState, branch: str):
+    """Interviewer prompt for a speculative next reply, before the candidate's answer is known."""
+    directive = PREFETCH_DIRECTIVE.format(
+        branch_hint=PREFETCH_BRANCH_HINTS[branch],
+        summary=state.get('summary') or "Начало интервью.",
+        directive=state.get('mentor_directive') or "нет"
+    )
+    return build_interviewer_prompt({**state, "mentor_directive": directive})
 
+def session_key(state: InterviewState) -> str:
+    return state.get('turn_log_path') or state.get('participant_name') or ""
 
-    mentor_runnable = mentor_model.with_structured_output(MentorOutput)
+def build_summary_prompt(current_summary: str, last_turn: TurnLog):
+    prompt = get_prompt("SUMMARY_PROMPT").format(
+        current_summary=current_summary,
+        user_message=last_turn.get('user_message', ''),
+        agent_message=last_turn.get('agent_visible_message', ''),
+        internal_thoughts=last_turn.get('internal_thoughts', '')
+    )
+    return [HumanMessage(content=prompt)]
+
+def build_batch_summary_prompt(current_summary: str, turns: List[TurnLog]):
+    turns_text = "\n\n".join(
+        f"Ход {t['turn_id']}:\nInterviewer Message: {t.get('agent_visible_message', '')}\n"
+        f"User Message: {t.get('user_message', '')}\nInternal Thoughts: {t.get('internal_thoughts', '')}"
+        for t in turns
+    )
+    prompt = get_prompt("SUMMARY_BATCH_PROMPT").format(current_summary=current_summary, turns=turns_text)
+    return [HumanMessage(content=prompt)]
+
+def build_report_prompt(state: InterviewState, turns: Optional[List[TurnLog]] = None,
+                        prompt_name: str = "FINAL_REPORT_SYSTEM_PROMPT"):
+    meta = state['session_meta']
+    
+    # Use summary + turns for final report
+    if turns is None:
+        turns = session_turns(state)
+    turns_text = json.dumps(turns, indent=2, ensure_ascii=False)
+    summary_text = state.get('summary', 'Нет саммари.')
+    
+    system_prompt = get_prompt(prompt_name).format(
+        participant_name=state['participant_name'],
+        position=meta['position'],
+        grade_target=meta['grade_target'],
+        summary=summary_text,
+        transcript=turns_text
+    )
+    return [SystemMessage(content=system_prompt)]
+
+def mentor_node(state: InterviewState):
+    """
+    Mentor agent analysis.
+    """
+    candidate_answer = state['messages'][-1].content
    
-    response: MentorOutput = mentor_runnable.invoke([
-        SystemMessage(content=system_prompt),
-        *messages
-    ])
+    with metered() as usage:
+        response: MentorOutput = invoke_structured(get_mentor_model(), MentorOutput, build_mentor_prompt(state), session_key(state))
     
     final_directive = response.directive
     if response.correction_needed and response.correction_details:
         final_directive += f" [CORRECTION INFO FOR INTERVIEWER: {response.correction_details}]"
     
-    return {
+    update = {
         "mentor_directive": final_directive,
         "mentor_thoughts": response.internal_thoughts,
         "mentor_confidence_score": response.confidence_score,
         "status": "stop_requested" if response.stop_interview_flag else state.get("status", "active"),
-        "last_candidate_answer": candidate_answer
+        "last_candidate_answer": candidate_answer,
+        "answer_branch": answer_branch(response.confidence_score, response.correction_needed, response.stop_interview_flag),
+        "fast_path": None,
+        "usage": usage
     }
+    # Приветствие еще не ответ на вопрос — в ряд оценок попадают только ответы
+    if state.get('last_interviewer_question'):
+        update.update(control(state, response.confidence_score, response.topic))
+    return update
 
 
-   
-def interviewer_node(state: InterviewState):
+def budget_node(state: InterviewState):
     """
-    Interviewer agent generation.
+    Budget governor: picks the degradation level for this turn and logs the decision.
     """
-    directive = state.get('mentor_directive')
-    meta = state['session_meta']
+    require_turn_log(state)
+    budget = state.get('budget') or default_budget()
+    # Заготовки прошлого хода (в т.ч. невзятые и отброшенные) тоже тратят бюджет
+    speculative = collect_usage(session_key(state))
+    usage = merge_usage(state.get('usage'), speculative)
+    level, reason = decide(budget, usage)
+    update = {
+        "budget": budget,
+        "budget_level": level,
+        "turn_started_at": time.time(),
+        "answer_branch": None,
+        "fast_path": None
+    }
+    if speculative:
+        update["usage"] = speculative
     
-    system_prompt = INTERVIEWER_SYSTEM_PROMPT.format(
-        position=meta['position'],
-        grade_target=meta['grade_target'],
-        experience=meta['experience']
-    )
+    # Ожидание в очереди лимитера пишется и без бюджета
+    if (budget_active(budget) or get_limiter()) and state.get('turn_log_path'):
+        append_record(
+            state['turn_log_path'],
+            "budget",
+            turn_id=state.get('current_turn_id', 0) + 1,
+            level=LEVELS[level],
+            reason=reason,
+            tokens=usage.get('input_tokens', 0) + usage.get('output_tokens', 0),
+            cost=round(usage.get('cost', 0), 6),
+            queue_wait=round(usage.get('queue_wait', 0), 3),
+            last_turn_latency=usage.get('last_turn_latency')
+        )
+    
+    # Ход без Ментора: интервьюер получает общую директиву вместо разбора ответа
+    if SKIP_MENTOR <= level < FORCE_REPORT:
+        update.update({
+            "mentor_directive": SKIP_MENTOR_DIRECTIVE,
+            "mentor_thoughts": f"Ментор пропущен губернатором бюджета ({LEVELS[level]}): {reason}.",
+            "last_candidate_answer": state['messages'][-1].content
+        })
+    return update
+
+
+def fast_path_node(state: InterviewState):
+    """
+    Handles stop commands and trivial input locally (no LLM calls).
+    """
+    candidate_answer = state['messages'][-1].content
+    level = state.get('budget_level', NORMAL)
+    reply = STOP_REPLY
     
-    messages = [SystemMessage(content=system_prompt)] + state['messages']
+    # Исчерпанный бюджет завершает интервью при любом вводе, даже пустом или off-topic
+    if level >= FORCE_REPORT:
+        kind, reply = STOP, BUDGET_STOP_REPLY
+        thoughts = "Бюджет сессии исчерпан: интервью завершается принудительно, LLM не вызывалась."
+    else:
+        kind = classify_message(candidate_answer)
+        # Без Ментора некому выставить stop_interview_flag: просьбу закончить распознает fast path
+        if kind is None and level >= SKIP_MENTOR and is_stop_intent(candidate_answer):
+            kind = STOP
+        thoughts = f"Локальный классификатор: {kind}. LLM не вызывалась."
     
-    if directive:
-         from agent.prompts import DIRECTIVE_CONTEXT_PROMPT
-         directive_context = DIRECTIVE_CONTEXT_PROMPT.format(directive=directive)
-         messages.append(SystemMessage(content=directive_context))
+    if kind == STOP:
+        return {
+            "messages": [AIMessage(content=reply)],
+            "last_interviewer_question": reply,
+            "mentor_thoughts": thoughts,
+            "interviewer_thoughts": thoughts,
+            "status": "stop_requested",
+            "last_candidate_answer": candidate_answer,
+            "fast_path": kind
+        }
     
-    from pydantic import BaseModel, Field
-    class InterviewerOutput(BaseModel):
-        thought_process: str = Field(description="Internal ReAct process: Understand answer -> Check Directive -> Formulate Plan.")
-        response_text: str = Field(description="The actual response/question to the candidate.")
-        call_mentor: bool = Field(description="True if you need Mentor's help/analysis (e.g. user answered tough question). False if you continue efficiently on your own.", default=True)
+    # Повторяем исходный вопрос, last_interviewer_question не меняется
+    return {
+        "messages": [AIMessage(content=redirect_reply(kind, state.get('last_interviewer_question', '')))],
+        "mentor_thoughts": thoughts,
+        "interviewer_thoughts": thoughts,
+        "last_candidate_answer": candidate_answer,
+        "fast_path": kind
+    }
 
-    interviewer_runnable = interviewer_model.with_structured_output(InterviewerOutput)
+
+   
+def interviewer_node(state: InterviewState):
+    """
+    Interviewer agent generation.
+    """
+    prefetched = None
+    if PREFETCH:
+        prefetched = claim(
+            session_key(state), state.get('last_interviewer_question', ''), state.get('answer_branch'),
+            state.get('mentor_directive'), state.get('difficulty_hint'), state.get('difficulty')
+        )
     
-    response: InterviewerOutput = interviewer_runnable.invoke(messages)
+    if prefetched:
+        # Расход взятой ветки и остальных завершившихся заготовок
+        response, usage = prefetched, collect_usage(session_key(state))
+        thoughts = f"[Заготовка: {state['answer_branch']}] {response.thought_process}"
+    else:
+        with metered() as usage:
+            response: InterviewerOutput = invoke_structured(
+                get_interviewer_model(), InterviewerOutput, build_interviewer_prompt(state), session_key(state)
+            )
+        thoughts = response.thought_process
     
     return {
         "messages": [AIMessage(content=response.response_text)],
         "last_interviewer_question": response.response_text,
-        "interviewer_thoughts": response.thought_process,
-        "call_mentor": response.call_mentor
+        "interviewer_thoughts": thoughts,
+        "call_mentor": response.call_mentor,
+        "usage": usage
     }
 
 
@@ -135,95 +357,226 @@ def logger_node(state: InterviewState):
         "internal_thoughts": internal_thoughts
     }
     
-    return {
-        "turns": [new_log], 
+    if state.get('turn_log_path'):
+        if turn_id == 1 and isinstance(messages[0], HumanMessage):
+            # Приветствие кандидата (в main.py задается пользователем) — для воспроизведения в форках
+            append_record(state['turn_log_path'], "opening", message=messages[0].content)
+        append_turn(state['turn_log_path'], new_log)
+        if state.get('fast_path'):
+            # Fast path не меняет summary и оценки, но снимок нужен, чтобы форкнуть сессию после этого хода
+            write_snapshot(state, turn_id, state.get('summary') or "Начало интервью.", state.get('summarized_turn_id') or 0)
+    
+    update = {
+        "last_turn": new_log, 
         "current_turn_id": turn_id
     }
+    # Задержка хода, видимая кандидату (до записи хода), — сигнал для губернатора бюджета
+    if state.get('turn_started_at'):
+        update["usage"] = {"last_turn_latency": time.time() - state['turn_started_at']}
+    return update
+
+def write_snapshot(state: InterviewState, turn_id: int, summary: str, summarized_turn_id: int):
+    """Appends the scalar state after turn_id to the log (fork.py restores a branch from it)."""
+    append_record(
+        state['turn_log_path'],
+        "snapshot",
+        turn_id=turn_id,
+        summary=summary,
+        summarized_turn_id=summarized_turn_id,
+        mentor_confidence_score=state.get('mentor_confidence_score'),
+        confidence_series=state.get('confidence_series') or [],
+        topic_stats=state.get('topic_stats') or {},
+        difficulty=state.get('difficulty'),
+        last_interviewer_question=state.get('last_interviewer_question', '')
+    )
+
+def turns_in_window(state: InterviewState) -> int:
+    """Number of complete turns (question + answer) still visible in the prompt window."""
+    size = SHORT_HISTORY_MESSAGES if state.get('budget_level', NORMAL) >= SHORT_HISTORY else WINDOW_SIZE
+    # Окно заканчивается вопросом следующего хода: [..., вопрос k, ответ k, ..., ответ N, вопрос N+1]
+    return (size - 1) // 2
+
+def lazy_summary_enabled(state: InterviewState) -> bool:
+    return LAZY_SUMMARY and bool(state.get('turn_log_path'))
+
+def summary_pending(state: InterviewState) -> bool:
+    """Lazy mode: some logged turns are not folded into the summary yet (catch-up before the report)."""
+    return lazy_summary_enabled(state) and (state.get('summarized_turn_id') or 0) < state.get('current_turn_id', 0)
+
+def pending_summary_turns(state: InterviewState) -> List[TurnLog]:
+    """Turns to fold into the summary now: the latest one (eager) or the ones evicted from the window (lazy)."""
+    last_turn = state.get('last_turn')
+    if not last_turn:
+        return []
+    if not lazy_summary_enabled(state):
+        return [last_turn]
+    
+    summarized = state.get('summarized_turn_id') or 0
+    if state.get('status') == "stop_requested":
+        upto = last_turn['turn_id']
+    else:
+        upto = last_turn['turn_id'] - turns_in_window(state)
+        if upto - summarized < LAZY_SUMMARY_BATCH:
+            return []
+    return [t for t in read_turns(state['turn_log_path']) if summarized < t['turn_id'] <= upto]
 
 def memory_update_node(state: InterviewState):
     """
-    Updates the working memory (summary) based on the latest turn.
+    Updates the working memory (summary) with the latest turn,
+    or in lazy mode with the turns that left the message window.
     """
-    from agent.prompts import SUMMARY_PROMPT
-    
     # Get latest turn info
-    if not state.get('turns'):
+    last_turn = state.get('last_turn')
+    if not last_turn:
         return {} # No turns yet
-        
-    last_turn = state['turns'][-1]
     
     current_summary = state.get('summary') or "Начало интервью."
+    pending = pending_summary_turns(state)
     
-    prompt = SUMMARY_PROMPT.format(
-        current_summary=current_summary,
-        user_message=last_turn.get('user_message', ''),
-        agent_message=last_turn.get('agent_visible_message', ''),
-        internal_thoughts=last_turn.get('internal_thoughts', '')
-    )
+    usage = {}
+    new_summary = current_summary
+    if pending and state.get('budget_level', NORMAL) >= CHEAP_SUMMARY:
+        for turn in pending:
+            new_summary = cheap_summary(new_summary, turn)
+    elif len(pending) == 1:
+        with metered() as usage:
+            new_summary = invoke_text(get_mentor_model(), build_summary_prompt(current_summary, pending[0]), session_key(state))
+    elif pending:
+        with metered() as usage:
+            new_summary = invoke_text(get_mentor_model(), build_batch_summary_prompt(current_summary, pending), session_key(state))
+    summarized_turn_id = pending[-1]['turn_id'] if pending else state.get('summarized_turn_id') or 0
     
-    response = mentor_model.invoke([HumanMessage(content=prompt)])
-    new_summary = response.content
+    # Snapshot of the scalar state after this turn, so the session can be forked here
+    if state.get('turn_log_path'):
+        write_snapshot(state, last_turn['turn_id'], new_summary, summarized_turn_id)
     
     return {
-        "summary": new_summary
+        "summary": new_summary,
+        "summarized_turn_id": summarized_turn_id,
+        "usage": usage
     }
 
-def reporting_node(state: InterviewState):
+def _prefetch_reply(messages, session: str):
+    with metered() as usage:
+        response = invoke_structured(get_interviewer_model(), InterviewerOutput, messages, session, BACKGROUND)
+    return response, usage
+
+def prefetch_node(state: InterviewState):
     """
-    Generate the final report.
+    Speculatively prepares the next interviewer reply for the strong/weak answer branches
+    in the background, while the candidate is typing (see prefetch.py).
     """
-    meta = state['session_meta']
-    participant = state['participant_name']
+    question = state.get('last_interviewer_question')
+    # Под ограничением бюджета лишние вызовы не делаем
+    if not question or state.get('budget_level', NORMAL) > NORMAL:
+        return {}
     
-    # Use summary + turns for final report
-    turns_text = json.dumps(state['turns'], indent=2, ensure_ascii=False)
-    summary_text = state.get('summary', 'Нет саммари.')
+    # Промпты собираются сразу: драйверы дописывают ответ кандидата в тот же список messages
+    jobs = {}
+    for branch in BRANCHES:
+        messages = build_prefetch_prompt(state, branch)
+        jobs[branch] = lambda messages=messages: _prefetch_reply(messages, session_key(state))
+    speculate(session_key(state), question, jobs, state.get('difficulty'))
+    return {}
+
+def resolve_resource_link(item: RoadmapItem, position: str):
+    """Finds a learning resource for a roadmap item via web search (fills item.resource_link)."""
+    try:
+        query = f"{item.topic} tutorial documentation {position}"
+        search_results_str = search_web(query)
+        
+        link = ""
+        try:
+            urls = re.findall(r'(https?://[^\s,\]"\']+)', search_results_str)
+            if urls:
+                link = urls[0]
+        except:
+            pass
+        
+        if link:
+            item.resource_link = link
+        else:
+            item.resource_link = "Не удалось найти прямую ссылку, рекомендуется поиск по теме."
+            
+    except Exception as e:
+        item.resource_link = f"Ошибка поиска: {str(e)}"
+
+def _report_section(context, name: str, session: str):
+    section_cls = REPORT_SECTIONS[name]
+    messages = context + [SystemMessage(content=REPORT_SECTION_INSTRUCTIONS[name])]
+    with metered() as usage:
+        section = invoke_structured(get_mentor_model(), section_cls, messages, session, BACKGROUND)
+    return section, usage
+
+def _generate_report_sections(state: InterviewState, turns: Optional[List[TurnLog]], session: str):
+    position = state['session_meta'].get('position', 'developer')
+    context = build_report_prompt(state, turns, "REPORT_CONTEXT_PROMPT")
     
-    system_prompt = FINAL_REPORT_SYSTEM_PROMPT.format(
-        participant_name=participant,
-        position=meta['position'],
-        grade_target=meta['grade_target'],
-        summary=summary_text,
-        transcript=turns_text
-    )
+    futures = {_report_executor.submit(bind(_report_section), context, name, session): name for name in REPORT_SECTIONS}
+    data, usage, link_jobs = {}, {}, []
+    for future in as_completed(futures):
+        section, section_usage = future.result()
+        usage = merge_usage(usage, section_usage)
+        if futures[future] == "roadmap":
+            # Ссылки ищем, не дожидаясь остальных разделов
+            link_jobs = [_report_executor.submit(bind(resolve_resource_link), item, position) for item in section.personal_roadmap]
+        data.update(dict(section))
+    
+    # Разделы генерируются независимо: пробелы без roadmap — раздел roadmap запрашивается заново
+    if data.get("knowledge_gaps") and not data.get("personal_roadmap"):
+        retry = context + [SystemMessage(content=ROADMAP_FOR_GAPS_PROMPT.format(gaps="; ".join(data["knowledge_gaps"])))]
+        section, section_usage = _report_section(retry, "roadmap", session)
+        usage = merge_usage(usage, section_usage)
+        if not section.personal_roadmap:
+            raise ValueError("Отчет: есть knowledge_gaps, но раздел roadmap пуст и после повтора.")
+        link_jobs += [_report_executor.submit(bind(resolve_resource_link), item, position) for item in section.personal_roadmap]
+        data.update(dict(section))
+    
+    for job in link_jobs:
+        job.result()
+    return FinalFeedback.model_validate(data), usage
 
-    feedback_runnable = mentor_model.with_structured_output(FinalFeedback)
-    response: FinalFeedback = feedback_runnable.invoke([
-        SystemMessage(content=system_prompt)
-    ])
+def generate_report(state: InterviewState, turns: Optional[List[TurnLog]] = None, session: Optional[str] = None):
+    """
+    The reporting stage on its own: FinalFeedback (in parallel sections or one call)
+    + resource links for the roadmap.
+    `turns` replaces the session store and `session` the rate-limiter key
+    (re-grading archived logs, see regrade.py).
+    Returns (FinalFeedback, usage).
+    """
+    session = session or session_key(state)
+    if PARALLEL_REPORT:
+        return _generate_report_sections(state, turns, session)
+    
+    meta = state['session_meta']
+
+    with metered() as usage:
+        response: FinalFeedback = invoke_structured(
+            get_mentor_model(), FinalFeedback, build_report_prompt(state, turns), session, BACKGROUND
+        )
     
     if response.personal_roadmap:
         for item in response.personal_roadmap:
             if not isinstance(item, RoadmapItem):
                 continue
-                
-            topic = item.topic
-            try:
-                query = f"{topic} tutorial documentation {meta.get('position', 'developer')}"
-                search_results_str = search_tool.invoke(query)
-                
-                link = ""
-                try:
-                    import re
-                    urls = re.findall(r'(https?://[^\s,\]"\']+)', search_results_str)
-                    if urls:
-                        link = urls[0]
-                except:
-                    pass
-                
-                if link:
-                    item.resource_link = link
-                else:
-                    item.resource_link = "Не удалось найти прямую ссылку, рекомендуется поиск по теме."
-                    
-            except Exception as e:
-                item.resource_link = f"Ошибка поиска: {str(e)}"
+            resolve_resource_link(item, meta.get('position', 'developer'))
+    
+    return response, usage
+
+def reporting_node(state: InterviewState):
+    """
+    Generate the final report.
+    """
+    speculative = discard(session_key(state))
+    response, usage = generate_report(state)
+    usage = merge_usage(usage, speculative)
     
     formatted_feedback_str = json.dumps(response.model_dump(), indent=2, ensure_ascii=False)
     
     return {
         "final_feedback": formatted_feedback_str, 
-        "status": "finished"
+        "status": "finished",
+        "usage": usage
     }
 
 
@@ -0,0 +1,149 @@
+"""
+Спекулятивная подготовка следующей реплики Интервьюера, пока кандидат печатает ответ.
+
+В конце хода prefetch_node запускает в фоне две генерации — на случай сильного и слабого ответа.
+Когда Ментор оценил настоящий ответ, interviewer_node забирает подходящую заготовку (claim)
+вместо живого вызова LLM. Ключ заготовки — (сессия, заданный вопрос), поэтому повтор вопроса
+на быстром пути ее не сбрасывает. Включение: PREFETCH=1.
+
+Заготовка строилась до оценки ответа, поэтому берется, только если настоящий разбор Ментора
+не противоречит ветке (fits_branch): сложность сдвинулась в ту же сторону, директива не просит обратного.
+Ждать незаконченную заготовку дольше CLAIM_TIMEOUT нет смысла — живой вызов тогда быстрее.
+
+Задача ветки возвращает (результат, usage). Расход копится по сессии независимо от судьбы заготовки
+(взята, отброшена, не дождались) и забирается collect_usage в следующем узле хода — губернатор бюджета
+видит все спекулятивные вызовы, а не только взятую ветку.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agent.budget import merge_usage
+from agent.cassette import bind
+
+PREFETCH = os.getenv("PREFETCH", "0") == "1"
+
+STRONG, WEAK = "strong", "weak"
+BRANCHES = (STRONG, WEAK)
+STRONG_SCORE = 71  # confidence_score 71-100 — глубокий ответ с примерами
+CLAIM_TIMEOUT = 0.5
+MAX_WORKERS = 4
+
+# Директива Ментора, несовместимая с веткой: сильная ветка уже углубляется, слабая — остается в теме и упрощает
+DIRECTIVE_CONFLICTS = {
+    STRONG: ("проще", "упрост", "наводящ", "подсказ", "повтор", "переформулир", "объясни"),
+    WEAK: ("смени тему", "перейди", "переходи", "следующ", "сложнее", "усложн", "новую тему", "другую тему"),
+}
+TOPIC_DONE_MARKER = "смени тему"  # из difficulty_hint: тема раскрыта
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+# session_key -> (хэш вопроса, {ветка: Future}, сложность на момент заготовки)
+_pending: Dict[str, Tuple[str, Dict[str, Future], Optional[int]]] = {}
+# session_key -> расход завершившихся заготовок, еще не учтенный в state["usage"]
+_spent: Dict[str, Dict[str, float]] = {}
+_sessions = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="prefetch")
+        return _executor
+
+
+def _question_key(question: str) -> str:
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
+
+def answer_branch(confidence_score: float, correction_needed: bool, stop: bool) -> Optional[str]:
+    """
+    Maps the mentor's assessment to a prefetch branch. None — no reuse:
+    a correction needs the actual answer, a stop needs no next question.
+    """
+    if stop or correction_needed:
+        return None
+    return STRONG if confidence_score >= STRONG_SCORE else WEAK
+
+
+def fits_branch(branch: str, directive: Optional[str], hint: Optional[str],
+                base_difficulty: Optional[int], difficulty: Optional[int]) -> bool:
+    """Whether the mentor's actual directive and difficulty agree with what the branch reply assumed."""
+    if base_difficulty is not None and difficulty is not None:
+        if (branch == STRONG and difficulty < base_difficulty) or (branch == WEAK and difficulty > base_difficulty):
+            return False
+    if branch == WEAK and TOPIC_DONE_MARKER in (hint or "").lower():
+        return False
+    text = (directive or "").lower()
+    return not any(word in text for word in DIRECTIVE_CONFLICTS[branch])
+
+
+def _cancel(entry: Optional[Tuple[str, Dict[str, Future], Optional[int]]]):
+    if entry:
+        for future in entry[1].values():
+            future.cancel()
+
+
+def _metered_job(session_key: str, fn: Callable[[], Tuple[Any, Dict[str, float]]]) -> Callable[[], Any]:
+    def run():
+        result, usage = fn()
+        with _lock:
+            if session_key in _sessions:
+                _spent[session_key] = merge_usage(_spent.get(session_key), usage)
+        return result
+    return run
+
+
+def collect_usage(session_key: str) -> Dict[str, float]:
+    """Usage of the session's finished speculative jobs since the last call (empty dict if none)."""
+    with _lock:
+        return _spent.pop(session_key, {})
+
+
+def speculate(session_key: str, question: str, jobs: Dict[str, Callable[[], Tuple[Any, Dict[str, float]]]],
+              difficulty: Optional[int] = None):
+    """Starts the branch jobs (returning (result, usage)) in the background, replacing earlier ones of the session."""
+    executor = _get_executor()
+    # Задача переживает ход: кассету текущей сессии передаем явно
+    futures = {branch: executor.submit(bind(_metered_job(session_key, fn))) for branch, fn in jobs.items()}
+    with _lock:
+        _sessions.add(session_key)
+        previous = _pending.pop(session_key, None)
+        _pending[session_key] = (_question_key(question), futures, difficulty)
+    _cancel(previous)
+
+
+def claim(session_key: str, question: str, branch: Optional[str], directive: Optional[str] = None,
+          hint: Optional[str] = None, difficulty: Optional[int] = None, timeout: float = CLAIM_TIMEOUT) -> Optional[Any]:
+    """
+    Takes the prefetched result for the branch if it fits the mentor's directive / difficulty
+    (waits at most `timeout` if still running). The session entry is dropped either way;
+    None means "call the model live".
+    """
+    with _lock:
+        entry = _pending.pop(session_key, None)
+    if (entry is None or entry[0] != _question_key(question) or branch not in entry[1]
+            or not fits_branch(branch, directive, hint, entry[2], difficulty)):
+        _cancel(entry)
+        return None
+
+    for other, future in entry[1].items():
+        if other != branch:
+            future.cancel()
+    try:
+        return entry[1][branch].result(timeout=timeout)
+    except Exception:
+        return None
+
+
+def discard(session_key: str):
+    """Drops the session's speculation (end of session); returns its not yet collected usage."""
+    with _lock:
+        entry = _pending.pop(session_key, None)
+        _sessions.discard(session_key)
+        spent = _spent.pop(session_key, {})
+    _cancel(entry)
+    return spent
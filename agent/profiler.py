@@ -0,0 +1,176 @@
+"""
+Сэмплирующий профайлер ходов для драйверов (main.py / debug_runner.py --profile).
+
+Фоновый поток с частотой 1/SAMPLE_INTERVAL снимает стеки всех потоков (sys._current_frames)
+только внутри хода. Для каждого хода пишутся:
+    <лог>.profile/turn-NNN.folded — свернутые стеки ("a;b;c count"), формат flamegraph.pl / speedscope;
+    <лог>.profile/summary.json    — wall / CPU / ожидание I/O и доли категорий по ходам.
+
+CPU — time.thread_time() потока драйвера за ход, ожидание I/O — остаток wall-времени. CPU всего процесса
+(process_cpu: сэмплер, фоновые prefetch и разделы отчета) пишется справочно и в ожидание не входит. Кадры записываются
+без номеров строк, категории — доли сэмплов, поэтому результаты разных прогонов сравнимы по ходам.
+"""
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+from agent.rate_limit import format_stats, get_limiter
+from agent.turn_log import write_json_atomic
+
+SAMPLE_INTERVAL = 0.01
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))).replace("\\", "/")
+
+# Категория сэмпла — по первому совпавшему кадру, начиная с листа стека
+CATEGORY_RULES = [
+    ("network", ("/ssl.py", "/socket.py", "/selectors.py", "/httpcore/", "/httpx/", "/h11/", "/urllib3/", "/http/client.py")),
+    ("parsing", ("/pydantic/", "/pydantic_core/", "/json/", "/output_parsers/", "/function_calling.py")),
+    ("state", ("/langgraph/channels/", "/agent/state.py")),
+    ("framework", ("/langchain_core/", "/langchain_openai/", "/langchain_community/", "/langgraph/", "/openai/")),
+    ("app", ("/agent/", "/main.py", "/debug_runner.py")),
+]
+CATEGORIES = [name for name, _ in CATEGORY_RULES] + ["other"]
+
+# Потоки, ждущие работы (пулы, очереди), в профиль не попадают
+IDLE_LEAVES = {("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker"), ("threading.py", "_wait_for_tstate_lock")}
+
+
+def _frame_label(frame) -> str:
+    path = frame.f_code.co_filename.replace("\\", "/")
+    marker = "/site-packages/"
+    if marker in path:
+        path = path.split(marker, 1)[1]
+    elif path.startswith(REPO_ROOT + "/"):
+        path = path[len(REPO_ROOT) + 1:]
+    return f"{path}:{frame.f_code.co_name}"
+
+
+def _categorize(paths: List[str]) -> str:
+    for path in reversed(paths):
+        for name, markers in CATEGORY_RULES:
+            if any(m in path for m in markers):
+                return name
+    return "other"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._stacks: Counter = Counter()
+        self._categories: Counter = Counter()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if not self._active.is_set():
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                leaf = frames[0].f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                    continue
+                frames.reverse()
+                labels = [names.get(ident, "thread")] + [_frame_label(f) for f in frames]
+                category = _categorize([f.f_code.co_filename.replace("\\", "/") for f in frames])
+                with self._lock:
+                    self._stacks[";".join(labels)] += 1
+                    self._categories[category] += 1
+
+    def begin(self):
+        with self._lock:
+            self._stacks.clear()
+            self._categories.clear()
+        self._active.set()
+
+    def end(self):
+        self._active.clear()
+        with self._lock:
+            return Counter(self._stacks), Counter(self._categories)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class TurnProfiler:
+    """Per-turn profiles next to the interview log: <log base>.profile/."""
+
+    def __init__(self, log_path: str, interval: float = SAMPLE_INTERVAL):
+        base = os.path.splitext(log_path)[0]
+        self.out_dir = f"{base}.profile"
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.sampler = SamplingProfiler(interval)
+        self.turns: List[Dict] = []
+        self.meta = {
+            "interval": interval,
+            "python": platform.python_version(),
+            "lean_prompts": os.getenv("LEAN_PROMPTS", "0") == "1",
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    @contextmanager
+    def turn(self, label: Optional[str] = None):
+        index = len(self.turns)
+        wall_start, cpu_start, process_start = time.perf_counter(), time.thread_time(), time.process_time()
+        self.sampler.begin()
+        try:
+            yield
+        finally:
+            stacks, categories = self.sampler.end()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            process_cpu = time.process_time() - process_start
+            self._write_turn(index, label, wall, cpu, process_cpu, stacks, categories)
+
+    def _write_turn(self, index, label, wall, cpu, process_cpu, stacks, categories):
+        folded_path = os.path.join(self.out_dir, f"turn-{index:03d}.folded")
+        with open(folded_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        samples = sum(categories.values())
+        entry = {
+            "turn": index,
+            "label": label,
+            "wall": round(wall, 4),
+            "cpu": round(cpu, 4),
+            "io_wait": round(max(0.0, wall - cpu), 4),
+            "process_cpu": round(process_cpu, 4),
+            "samples": samples,
+            "categories": {c: round(categories[c] / samples, 4) if samples else 0.0 for c in CATEGORIES},
+            "folded": os.path.basename(folded_path),
+        }
+        self.turns.append(entry)
+        write_json_atomic(os.path.join(self.out_dir, "summary.json"), {**self.meta, "turns": self.turns})
+        print(f"[profile] ход {index}: wall {wall:.2f}s, CPU {cpu:.2f}s (процесс {process_cpu:.2f}s), "
+              f"ожидание {entry['io_wait']:.2f}s, "
+              + ", ".join(f"{c} {share:.0%}" for c, share in entry["categories"].items() if share))
+
+    def close(self):
+        self.sampler.close()
+        limiter = get_limiter()
+        if limiter:
+            stats = limiter.stats()
+            write_json_atomic(os.path.join(self.out_dir, "summary.json"), {**self.meta, "turns": self.turns, "rate_limit": stats})
+            print(f"[profile] очередь лимитера: {format_stats(stats)}")
+        print(f"[profile] профили ходов: {self.out_dir}")
+
+
+def profile_turn(profiler: Optional[TurnProfiler], label: Optional[str] = None):
+    """profiler.turn(label) or a no-op context when profiling is off."""
+    return profiler.turn(label) if profiler else nullcontext()
@@ -0,0 +1,181 @@
+"""
+Профайлер бюджета входных токенов по узлам графа.
+
+Для каждого узла считает токены по сегментам (system / schema / history / directive)
+в полном и lean-режиме (LEAN_PROMPTS=1) на основе реального лога интервью:
+
+    python -m agent.prompt_profile --log logs/interview_log_5.json
+
+reporting_node считается так, как он выполняется: один вызов FINAL_REPORT_SYSTEM_PROMPT (по умолчанию)
+или, при PARALLEL_REPORT=1, четыре вызова REPORT_CONTEXT_PROMPT с инструкцией и схемой своего раздела.
+"""
+import argparse
+import json
+from functools import lru_cache
+from typing import Dict, List
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent.models import MentorOutput, InterviewerOutput, FinalFeedback, REPORT_SECTIONS, schema_for
+from agent.nodes import PARALLEL_REPORT
+from agent.prompts import get_prompt, REPORT_SECTION_INSTRUCTIONS
+
+MESSAGE_OVERHEAD = 4  # служебные токены на сообщение в chat-формате
+WINDOW = 12
+SAMPLE_DIRECTIVE = "Попроси кандидата привести пример из практики и уточни, как это работает под капотом."
+SEGMENTS = ["system", "schema", "history", "directive"]
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoder = _encoder()
+    if encoder is None:
+        # Грубая оценка для смешанного русско-английского текста
+        return len(text) // 3
+    return len(encoder.encode(text))
+
+
+def _messages_tokens(texts: List[str]) -> int:
+    return sum(count_tokens(t) + MESSAGE_OVERHEAD for t in texts)
+
+
+def _schema_tokens(model_cls, lean: bool) -> int:
+    tool = convert_to_openai_tool(schema_for(model_cls, lean))
+    return count_tokens(json.dumps(tool["function"], ensure_ascii=False))
+
+
+def sample_from_log(path: str) -> Dict:
+    """Rebuilds a mid-interview state (window, transcript, summary stand-in) from a log file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    turns = data.get("turns", [])
+    meta = data.get("session_meta") or {
+        "position": "Backend Developer", "grade_target": "Middle", "experience": "3 года"
+    }
+
+    history = ["Здравствуйте, я готов к интервью."]
+    for t in turns:
+        history += [t.get("agent_visible_message", ""), t.get("user_message", "")]
+
+    # Мысли Ментора по прошлым ходам — приближение к размеру рабочего summary
+    observer = [t.get("internal_thoughts", "").split("\n[Interviewer]")[0] for t in turns[:-1]]
+    return {
+        "participant_name": data.get("participant_name", "Кандидат"),
+        "meta": meta,
+        "window": history[-WINDOW:],
+        "turns": turns,
+        "summary": " ".join(observer)[:1500] or "Начало интервью.",
+    }
+
+
+def _report_profile(sample: Dict, lean: bool, parallel: bool) -> Dict[str, int]:
+    """Input tokens of the report stage: one call, or one call per section over the shared context."""
+    meta = sample["meta"]
+    fields = dict(participant_name=sample["participant_name"], position=meta["position"],
+                  grade_target=meta["grade_target"], summary="", transcript="")
+    history = count_tokens(sample["summary"]) + count_tokens(json.dumps(sample["turns"], indent=2, ensure_ascii=False))
+    if not parallel:
+        return {
+            "system": _messages_tokens([get_prompt("FINAL_REPORT_SYSTEM_PROMPT", lean).format(**fields)]),
+            "schema": _schema_tokens(FinalFeedback, lean),
+            "history": history,
+        }
+
+    # Контекст (с транскриптом) уходит в каждый раздел; повтор раздела roadmap не учитывается
+    context = get_prompt("REPORT_CONTEXT_PROMPT", lean).format(**fields)
+    return {
+        "system": len(REPORT_SECTIONS) * _messages_tokens([context])
+                  + _messages_tokens([REPORT_SECTION_INSTRUCTIONS[name] for name in REPORT_SECTIONS]),
+        "schema": sum(_schema_tokens(section_cls, lean) for section_cls in REPORT_SECTIONS.values()),
+        "history": len(REPORT_SECTIONS) * history,
+    }
+
+
+def profile(sample: Dict, lean: bool, parallel_report: bool = PARALLEL_REPORT) -> Dict[str, Dict[str, int]]:
+    meta = sample["meta"]
+    window = sample["window"]
+    last_turn = sample["turns"][-1] if sample["turns"] else {}
+    result = {}
+
+    mentor_system = get_prompt("MENTOR_SYSTEM_PROMPT", lean).format(
+        participant_name=sample["participant_name"], position=meta["position"],
+        grade_target=meta["grade_target"], experience=meta["experience"]
+    )
+    result["mentor_node"] = {
+        "system": _messages_tokens([mentor_system]),
+        "schema": _schema_tokens(MentorOutput, lean),
+        "history": _messages_tokens(window),
+    }
+
+    interviewer_system = get_prompt("INTERVIEWER_SYSTEM_PROMPT", lean).format(
+        position=meta["position"], grade_target=meta["grade_target"], experience=meta["experience"]
+    )
+    result["interviewer_node"] = {
+        "system": _messages_tokens([interviewer_system]),
+        "schema": _schema_tokens(InterviewerOutput, lean),
+        "history": _messages_tokens(window),
+        "directive": _messages_tokens([get_prompt("DIRECTIVE_CONTEXT_PROMPT", lean).format(directive=SAMPLE_DIRECTIVE)]),
+    }
+
+    summary_template = get_prompt("SUMMARY_PROMPT", lean).format(
+        current_summary="", user_message="", agent_message="", internal_thoughts=""
+    )
+    result["memory_update_node"] = {
+        "system": _messages_tokens([summary_template]),
+        "history": count_tokens(sample["summary"]) + count_tokens(last_turn.get("user_message", ""))
+                   + count_tokens(last_turn.get("agent_visible_message", ""))
+                   + count_tokens(last_turn.get("internal_thoughts", "")),
+    }
+
+    result["reporting_node"] = _report_profile(sample, lean, parallel_report)
+    return result
+
+
+def _total(node: Dict[str, int]) -> int:
+    return sum(node.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Разбивка входных токенов по узлам (full vs lean).")
+    parser.add_argument("--log", default="logs/interview_log_1.json")
+    parser.add_argument("--json", action="store_true", help="Вывести результат в JSON")
+    args = parser.parse_args()
+
+    sample = sample_from_log(args.log)
+    full, lean = profile(sample, lean=False), profile(sample, lean=True)
+
+    if args.json:
+        print(json.dumps({"full": full, "lean": lean}, indent=2))
+        return
+
+    if _encoder() is None:
+        print("tiktoken недоступен — используется оценка len(text) // 3.\n")
+    print(f"Отчет: {'4 раздела параллельно (PARALLEL_REPORT=1)' if PARALLEL_REPORT else 'один вызов'}\n")
+
+    print(f"{'node':<20}{'segment':<11}{'full':>8}{'lean':>8}{'saved':>8}")
+    for node in full:
+        for segment in SEGMENTS:
+            if segment not in full[node]:
+                continue
+            f, l = full[node][segment], lean[node][segment]
+            saved = f"{(f - l) / f:.0%}" if f else "-"
+            print(f"{node:<20}{segment:<11}{f:>8}{l:>8}{saved:>8}")
+        print(f"{node:<20}{'TOTAL':<11}{_total(full[node]):>8}{_total(lean[node]):>8}")
+        print()
+
+    per_turn = ["mentor_node", "interviewer_node", "memory_update_node"]
+    f_turn = sum(_total(full[n]) for n in per_turn)
+    l_turn = sum(_total(lean[n]) for n in per_turn)
+    print(f"Входные токены на обычный ход: {f_turn} -> {l_turn} (-{f_turn - l_turn}, {(f_turn - l_turn) / f_turn:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Банк вступительных вопросов по (позиции, грейду).
+
+Первый ход интервью почти не зависит от кандидата, поэтому его можно сгенерировать заранее
+и отдавать без вызова LLM. Ключ — только (позиция, грейд): вступления генерируются без опыта кандидата
+("Не указан") и потому общие — опыт учитывается со второго хода, когда Ментор видит ответ.
+Банк пополняется офлайн (CLI ниже). Фоновое пополнение при малом остатке (живые вызовы LLM
+с фоновым приоритетом лимитера) включается явно: QUESTION_BANK_REFILL=1.
+Банк общий для процессов (воркеры agent/workers.py): чтение-изменение-запись файла идет под
+файловой блокировкой <path>.lock, а не только под блокировкой потоков.
+
+    python -m agent.question_bank --position "Python Developer" --grade Junior -n 5
+"""
+import argparse
+import json
+import os
+import random
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.cassette import bind
+from agent.turn_log import write_json_atomic
+
+BANK_PATH = os.getenv("QUESTION_BANK_PATH", "question_bank.json")
+BACKGROUND_REFILL = os.getenv("QUESTION_BANK_REFILL", "0") == "1"
+OPENING_DIRECTIVE = "Начни интервью с представления себя и задай первый релевантный вопрос."
+OPENING_GREETING = "Здравствуйте, я готов к интервью."
+
+MAX_USES = 3        # после стольких показов вступление выводится из ротации
+LOW_WATER = 3       # меньше живых вступлений — запускаем фоновое пополнение
+REFILL_BATCH = 3
+
+
+def bank_key(position: str, grade: str) -> str:
+    return f"{position.strip().lower()}|{grade.strip().lower()}"
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock on <path>.lock shared by all processes using the bank."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(f"{path}.lock", "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class QuestionBank:
+    """JSON-backed pool of openings with round-robin rotation and retirement after MAX_USES (process-safe)."""
+
+    def __init__(self, path: str = BANK_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._refilling = set()
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _live(self, entry: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [o for o in entry.get("openings", []) if o.get("uses", 0) < MAX_USES]
+
+    def available(self, position: str, grade: str) -> int:
+        with self._lock:
+            return len(self._live(self._load().get(bank_key(position, grade), {})))
+
+    def take(self, position: str, grade: str) -> Optional[str]:
+        """Returns the next opening for the key (or None if the bank is empty)."""
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            entry = data.get(bank_key(position, grade))
+            if not entry:
+                return None
+            live = self._live(entry)
+            if not live:
+                return None
+
+            cursor = entry.get("cursor", 0) % len(live)
+            opening = live[cursor]
+            opening["uses"] = opening.get("uses", 0) + 1
+
+            # Курсор хранится относительно списка без выведенных вступлений: если выданное вступление
+            # выбыло, на его место сдвигается следующее
+            entry["openings"] = self._live(entry)
+            retired = opening.get("uses", 0) >= MAX_USES
+            entry["cursor"] = (cursor if retired else cursor + 1) % len(entry["openings"]) if entry["openings"] else 0
+            write_json_atomic(self.path, data)
+            return opening["text"]
+
+    def add(self, position: str, grade: str, texts: List[str]):
+        with self._lock, file_lock(self.path):
+            data = self._load()
+            entry = data.setdefault(bank_key(position, grade), {
+                "position": position, "grade_target": grade, "openings": [], "cursor": 0
+            })
+            known = {o["text"] for o in entry["openings"]}
+            for text in texts:
+                if text and text not in known:
+                    entry["openings"].append({"text": text, "uses": 0})
+            random.shuffle(entry["openings"])
+            write_json_atomic(self.path, data)
+
+    def existing(self, position: str, grade: str) -> List[str]:
+        with self._lock:
+            return [o["text"] for o in self._load().get(bank_key(position, grade), {}).get("openings", [])]
+
+    def refill_async(self, position: str, grade: str, n: int = REFILL_BATCH):
+        """Tops the bank up in a daemon thread; at most one refill per key at a time."""
+        key = bank_key(position, grade)
+        with self._lock:
+            if key in self._refilling:
+                return
+            self._refilling.add(key)
+
+        def worker():
+            try:
+                self.add(position, grade, generate_openings(position, grade, n, self.existing(position, grade)))
+            except Exception as e:
+                print(f"Не удалось пополнить банк вопросов: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(key)
+
+        threading.Thread(target=bind(worker), daemon=True).start()
+
+
+def generate_openings(position: str, grade: str, n: int, avoid: Optional[List[str]] = None) -> List[str]:
+    """Runs the interviewer prompt with a synthetic first-turn state n times (background limiter priority)."""
+    from agent.models import InterviewerOutput
+    from agent.nodes import build_interviewer_prompt, get_interviewer_model, invoke_structured
+    from agent.rate_limit import BACKGROUND
+
+    openings = []
+    avoid = list(avoid or [])
+    for _ in range(n):
+        directive = OPENING_DIRECTIVE
+        if avoid:
+            used = "; ".join(text[:80] for text in avoid[-5:])
+            directive += f" Выбери тему первого вопроса, отличную от уже использованных вступлений: {used}"
+
+        prompt = build_interviewer_prompt({
+            "messages": [HumanMessage(content=OPENING_GREETING)],
+            "mentor_directive": directive,
+            "session_meta": {"position": position, "grade_target": grade, "experience": "Не указан"},
+        })
+        # Пополнение не должно отнимать квоту у ходов живых сессий
+        text = invoke_structured(
+            get_interviewer_model(), InterviewerOutput, prompt, f"question_bank:{bank_key(position, grade)}", BACKGROUND
+        ).response_text
+        openings.append(text)
+        avoid.append(text)
+    return openings
+
+
+_bank = QuestionBank()
+
+
+def serve_opening(state: Dict[str, Any], bank: QuestionBank = _bank) -> Optional[Dict[str, Any]]:
+    """
+    Returns the initial state extended with a pre-generated opening (no LLM call),
+    or None on a bank miss. With QUESTION_BANK_REFILL=1 a background refill is scheduled if the bank is low.
+    """
+    meta = state.get("session_meta") or {}
+    position, grade = meta.get("position", ""), meta.get("grade_target", "")
+    if not position or not grade:
+        return None
+
+    opening = bank.take(position, grade)
+    if BACKGROUND_REFILL and bank.available(position, grade) < LOW_WATER:
+        bank.refill_async(position, grade)
+    if opening is None:
+        return None
+
+    return {
+        **state,
+        "messages": list(state.get("messages", [])) + [AIMessage(content=opening)],
+        "last_interviewer_question": opening,
+        "interviewer_thoughts": "Вступительный вопрос из банка (без вызова LLM).",
+        "call_mentor": True,
+    }
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+    parser = argparse.ArgumentParser(description="Предгенерация вступительных вопросов.")
+    parser.add_argument("--position", required=True)
+    parser.add_argument("--grade", required=True, choices=["Junior", "Middle", "Senior"])
+    parser.add_argument("-n", type=int, default=5)
+    parser.add_argument("--bank", default=BANK_PATH)
+    args = parser.parse_args()
+
+    bank = QuestionBank(args.bank)
+    openings = generate_openings(args.position, args.grade, args.n, bank.existing(args.position, args.grade))
+    bank.add(args.position, args.grade, openings)
+    print(f"Добавлено {len(openings)} вступлений. В ротации: {bank.available(args.position, args.grade)}")
+
+
+if __name__ == "__main__":
+    main()
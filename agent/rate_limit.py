@@ -0,0 +1,176 @@
+"""
+Общий для процесса лимитер вызовов LLM-провайдера: token bucket по запросам и токенам в минуту
+плюс справедливая очередь между сессиями.
+
+- Интерактивные вызовы хода (Ментор, Интервьюер) всегда впереди фоновых (summary, отчет, prefetch).
+- Внутри одного приоритета сессии обслуживаются по кругу: тяжелая сессия не забирает всю квоту.
+- Время ожидания в очереди копится в usage["queue_wait"] (через metered) и в stats().
+
+Включение: RATE_LIMIT_RPM / RATE_LIMIT_TPM (0 — без ограничения, лимитер не создается).
+Токены вызова оцениваются заранее по длине промпта: фактический расход известен только после ответа.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional
+
+INTERACTIVE, BACKGROUND = 0, 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+CHARS_PER_TOKEN = 3
+OUTPUT_TOKENS_ESTIMATE = 500
+WAIT_SAMPLES = 1000
+
+_local = threading.local()
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 — available now)."""
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+
+class RateLimiter:
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._cond = threading.Condition()
+        # приоритет -> {сессия: очередь билетов}; порядок сессий — круговой
+        self._queues: Dict[int, "OrderedDict[str, Deque[object]]"] = {INTERACTIVE: OrderedDict(), BACKGROUND: OrderedDict()}
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self._calls: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+
+    def _head(self) -> Optional[object]:
+        for priority in (INTERACTIVE, BACKGROUND):
+            sessions = self._queues[priority]
+            if sessions:
+                return sessions[next(iter(sessions))][0]
+        return None
+
+    def _delay(self, tokens: float) -> float:
+        now = time.monotonic()
+        delay = 0.0
+        if self._requests:
+            self._requests.refill(now)
+            delay = max(delay, self._requests.delay(1))
+        if self._tokens:
+            self._tokens.refill(now)
+            delay = max(delay, self._tokens.delay(tokens))
+        return delay
+
+    def _grant(self, priority: int, session: str, tokens: float):
+        sessions = self._queues[priority]
+        sessions[session].popleft()
+        if sessions[session]:
+            sessions.move_to_end(session)
+        else:
+            del sessions[session]
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(tokens)
+
+    def acquire(self, session: str, priority: int = INTERACTIVE, tokens: float = 0) -> float:
+        """Blocks until the call may go out; returns the queue wait in seconds."""
+        if self._tokens:
+            tokens = min(tokens, self._tokens.capacity)
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            self._queues[priority].setdefault(session, deque()).append(ticket)
+            while True:
+                delay = self._delay(tokens)
+                is_head = self._head() is ticket
+                if is_head and delay == 0:
+                    self._grant(priority, session, tokens)
+                    break
+                # Не первый в очереди — ждем, пока очередь сдвинется; первый — пока наполнится бакет
+                self._cond.wait(delay if is_head else None)
+            wait = time.monotonic() - started
+            self._waits[priority].append(wait)
+            self._calls[priority] += 1
+            self._cond.notify_all()
+        return wait
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Queue wait per priority: calls, avg / p95 / max over the last WAIT_SAMPLES calls."""
+        with self._cond:
+            result = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                result[name] = {
+                    "calls": self._calls[priority],
+                    "queued": sum(len(q) for q in self._queues[priority].values()),
+                    "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                    "p95_wait": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    "max_wait": waits[-1] if waits else 0.0,
+                }
+            return result
+
+
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "0"))
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "0"))
+
+_limiter: Optional[RateLimiter] = None
+if RATE_LIMIT_RPM or RATE_LIMIT_TPM:
+    _limiter = RateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_TPM)
+
+
+def get_limiter() -> Optional[RateLimiter]:
+    return _limiter
+
+
+def merge_stats(parts: List[Optional[Dict[str, Dict[str, float]]]]) -> Dict[str, Dict[str, float]]:
+    """Combines stats() of several limiters (one per worker): sums, call-weighted avg, max of p95 / max."""
+    result = {}
+    for name in PRIORITY_NAMES.values():
+        rows = [part[name] for part in parts if part]
+        calls = sum(row["calls"] for row in rows)
+        result[name] = {
+            "calls": calls,
+            "queued": sum(row["queued"] for row in rows),
+            "avg_wait": sum(row["avg_wait"] * row["calls"] for row in rows) / calls if calls else 0.0,
+            "p95_wait": max((row["p95_wait"] for row in rows), default=0.0),
+            "max_wait": max((row["max_wait"] for row in rows), default=0.0),
+        }
+    return result
+
+
+def format_stats(stats: Dict[str, Dict[str, float]]) -> str:
+    return "; ".join(
+        f"{name}: {row['calls']} вызовов, ожидание avg {row['avg_wait']:.2f}s / p95 {row['p95_wait']:.2f}s / max {row['max_wait']:.2f}s"
+        for name, row in stats.items()
+    )
+
+
+def estimate_tokens(messages) -> int:
+    chars = sum(len(m.content) if isinstance(m.content, str) else len(str(m.content)) for m in messages)
+    return chars // CHARS_PER_TOKEN + OUTPUT_TOKENS_ESTIMATE
+
+
+def acquire_slot(session: str, priority: int, messages) -> float:
+    """Waits for the shared limiter (no-op when limits are not set)."""
+    if _limiter is None:
+        return 0.0
+    wait = _limiter.acquire(session, priority, estimate_tokens(messages))
+    _local.wait = thread_queue_wait() + wait
+    return wait
+
+
+def thread_queue_wait() -> float:
+    """Total queue wait of the current thread (metered() takes the difference)."""
+    return getattr(_local, "wait", 0.0)
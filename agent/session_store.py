@@ -0,0 +1,79 @@
+"""
+Общее локальное хранилище состояний сессий для пула воркеров (agent/workers.py).
+
+SQLite в режиме WAL: несколько процессов читают и пишут одну базу, запись сессии — одна строка
+(thread_id -> JSON состояния). Воркер сохраняет состояние после каждого завершенного хода, поэтому
+после перезапуска воркера (или всего пула) сессия продолжается с последнего хода.
+Сообщения сериализуются через messages_to_dict / messages_from_dict из langchain_core.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+STORE_PATH = os.getenv("SESSION_STORE", os.path.join("logs", "sessions.sqlite"))
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    thread_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    turn_id INTEGER,
+    status TEXT,
+    worker INTEGER,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def dump_state(state: Dict[str, Any]) -> str:
+    data = dict(state)
+    data["messages"] = messages_to_dict(state.get("messages") or [])
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_state(payload: str) -> Dict[str, Any]:
+    data = json.loads(payload)
+    data["messages"] = messages_from_dict(data.get("messages") or [])
+    return data
+
+
+class SessionStore:
+    """thread_id -> last committed graph state. One instance (connection) per process."""
+
+    def __init__(self, path: str = STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def save(self, thread_id: str, state: Dict[str, Any], worker: Optional[int] = None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sessions (thread_id, state, turn_id, status, worker, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (thread_id, dump_state(state), state.get("current_turn_id"), state.get("status"), worker, time.time())
+        )
+
+    def load(self, thread_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute("SELECT state FROM sessions WHERE thread_id = ?", (thread_id,)).fetchone()
+        return load_state(row[0]) if row else None
+
+    def delete(self, thread_id: str):
+        self._conn.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+
+    def sessions(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Session index without states: thread_id, turn_id, status, worker, updated_at."""
+        query = "SELECT thread_id, turn_id, status, worker, updated_at FROM sessions"
+        rows = self._conn.execute(query + " WHERE status = ?", (status,)) if status else self._conn.execute(query)
+        keys = ("thread_id", "turn_id", "status", "worker", "updated_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def close(self):
+        self._conn.close()
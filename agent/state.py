@@ -1,7 +1,9 @@
-import operator
 from typing import Annotated, List, Optional, TypedDict, Dict, Any, Union
 from langchain_core.messages import BaseMessage
 
+from agent.budget import merge_usage
+from agent.difficulty import append_series
+
 class SessionMeta(TypedDict):
     position: str
     grade_target: str
@@ -13,10 +15,12 @@ class TurnLog(TypedDict):
     user_message: str
     internal_thoughts: str 
 
+WINDOW_SIZE = 12
+
 def add_and_window(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
-    """Append new messages and keep only the last 12."""
+    """Append new messages and keep only the last WINDOW_SIZE (12)."""
     formatted_list = left + right
-    return formatted_list[-12:]
+    return formatted_list[-WINDOW_SIZE:]
 
 class InterviewState(TypedDict):
     # Chat history (Short-Term Memory: Last 12 messages)
@@ -27,11 +31,16 @@ class InterviewState(TypedDict):
     session_meta: Optional[SessionMeta] 
     
     # Interview progression
-    turns: Annotated[List[TurnLog], operator.add]
+    # Turn history lives in an external append-only store (JSONL, see turn_log.py);
+    # state carries only the handle and the most recent turn. Required: every driver opens the store
+    # (start_log) and passes the path in the initial state; the graph entry rejects a state without it.
+    turn_log_path: Optional[str]
+    last_turn: Optional[TurnLog]
     current_turn_id: int
     
     # Working Memory / Summary
     summary: str 
+    summarized_turn_id: int # Last turn already folded into summary (lazy mode, see memory_update_node)
     
     # Internal state for flow control
     last_candidate_answer: str
@@ -40,10 +49,23 @@ class InterviewState(TypedDict):
     mentor_thoughts: Optional[str]
     interviewer_thoughts: Optional[str]
     mentor_confidence_score: float
+    # Confidence trajectory and the local difficulty controller (see difficulty.py)
+    confidence_series: Annotated[List[float], append_series]
+    topic_stats: Dict[str, Dict[str, float]]
+    difficulty: int
+    difficulty_hint: Optional[str]
+    answer_branch: Optional[str] # "strong" / "weak" by the mentor's assessment, picks the prefetched reply (prefetch.py)
     
     # Status
     status: str # "active", "stop_requested", "finished"
     call_mentor: bool # New flag: Interviewer decides to call mentor
+    fast_path: Optional[str] # Set when the turn was handled by the local classifier (see fast_path.py)
+    
+    # Session budget (see budget.py): limits, accumulated usage and the current degradation level
+    budget: Optional[Dict[str, float]]
+    usage: Annotated[Dict[str, float], merge_usage]
+    budget_level: int
+    turn_started_at: Optional[float]
     
     # Final results
     final_feedback: Optional[Dict[str, Any]]
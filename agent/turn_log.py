@@ -0,0 +1,274 @@
+import atexit
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Каждый ход сразу пишется в ОС (flush), fsync — пачками, чтобы не тормозить на каждом ходе.
+FSYNC_EVERY = 5
+FSYNC_INTERVAL = 2.0
+
+# Служебные записи в том же JSONL отличаются ключом "_kind" и не попадают в список ходов:
+#   parent   — первая запись форка: ходы родителя до upto_turn_id (copy-on-write, без копирования)
+#   fork     — пометка в родителе, что от него отпочкован форк (такой лог не удаляется)
+#   snapshot — небольшой снимок состояния после хода (summary и т.п.) для форков
+#   opening  — первое сообщение кандидата (до хода 1), чтобы форк воспроизвел именно его
+KIND_KEY = "_kind"
+
+COUNTER_FILE = ".log_counter"
+LOG_PREFIX = "interview_log_"
+
+
+class TurnLogWriter:
+    """Append-only JSONL writer for TurnLog records with buffered, periodic fsync."""
+
+    def __init__(self, path: str, fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+_writers: Dict[str, TurnLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def _get_writer(path: str) -> TurnLogWriter:
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = TurnLogWriter(path)
+            _writers[path] = writer
+        return writer
+
+
+def append_turn(path: str, turn: Dict[str, Any]):
+    """Appends one turn to the session's JSONL log."""
+    _get_writer(path).append(turn)
+
+
+def append_record(path: str, kind: str, **fields):
+    """Appends a service record (parent / fork / snapshot / opening) to the session's JSONL log."""
+    _get_writer(path).append({KIND_KEY: kind, **fields})
+
+
+def close_log(path: str):
+    with _writers_lock:
+        writer = _writers.pop(path, None)
+    if writer:
+        writer.close()
+
+
+@atexit.register
+def _close_all():
+    for path in list(_writers):
+        close_log(path)
+
+
+def start_log(path: str):
+    """
+    Starts a fresh log at path; a leftover log from a crashed run is kept as <path>.prev.
+    A log that forks point to (parent_path) is never moved: pick a new path instead.
+    """
+    close_log(path)
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        if read_records(path, "fork"):
+            raise FileExistsError(f"{path}: лог — родитель форков, его нельзя перемещать. Используйте другой путь.")
+        os.replace(path, f"{path}.prev")
+    open(path, "w", encoding="utf-8").close()
+
+
+def _read_lines(path: str) -> List[Dict[str, Any]]:
+    # append() flushes every record, so the file is already up to date
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def read_records(path: str, kind: str) -> List[Dict[str, Any]]:
+    """Service records of one kind from this log only (parents are not followed)."""
+    return [r for r in _read_lines(path) if r.get(KIND_KEY) == kind]
+
+
+def read_turns(path: str) -> List[Dict[str, Any]]:
+    """
+    Reads turns back from a JSONL log. A torn last line (crash mid-write) is skipped.
+    For a forked log the shared prefix is read from the parent chain.
+    A turn written again (retry after a failure later in the same turn) keeps only its last record.
+    """
+    turns: Dict[int, Dict[str, Any]] = {}
+    for record in _read_lines(path):
+        kind = record.get(KIND_KEY)
+        if kind == "parent":
+            for t in read_turns(record["parent_path"]):
+                if t["turn_id"] <= record["upto_turn_id"]:
+                    turns[t["turn_id"]] = t
+        elif kind is None:
+            turns[record["turn_id"]] = record
+    return [turns[turn_id] for turn_id in sorted(turns)]
+
+
+def read_snapshots(path: str) -> List[Dict[str, Any]]:
+    """Snapshot records of a log; for a fork, the parent chain's snapshots up to the fork point come first."""
+    snapshots = []
+    for record in _read_lines(path):
+        kind = record.get(KIND_KEY)
+        if kind == "parent":
+            snapshots.extend(
+                s for s in read_snapshots(record["parent_path"]) if s["turn_id"] <= record["upto_turn_id"]
+            )
+        elif kind == "snapshot":
+            snapshots.append(record)
+    return snapshots
+
+
+def read_opening(path: str) -> Optional[str]:
+    """First candidate message of the session (a fork inherits its parent's), or None if not recorded."""
+    opening = None
+    for record in _read_lines(path):
+        kind = record.get(KIND_KEY)
+        if kind == "parent":
+            opening = read_opening(record["parent_path"])
+        elif kind == "opening":
+            opening = record["message"]
+    return opening
+
+
+def require_turn_log(state: Dict[str, Any]) -> str:
+    """turn_log_path of the session; raises if the driver did not open a store."""
+    path = state.get("turn_log_path")
+    if not path:
+        raise ValueError("В состоянии нет turn_log_path: откройте журнал ходов (start_log) и передайте путь "
+                         "в начальном состоянии, иначе отчет увидит только последний ход.")
+    return path
+
+
+def session_turns(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Full turn history of a session from its store."""
+    return read_turns(require_turn_log(state))
+
+
+def write_json_atomic(path: str, data: Any):
+    """Writes JSON via a temp file + fsync + rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def finalize_log(path: str, output_path: str, participant_name: str, final_feedback: Any,
+                 session_meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Closes the JSONL log and atomically writes the final interview log
+    (participant_name, session_meta, turns, final_feedback).
+    """
+    close_log(path)
+    log_data = {
+        "participant_name": participant_name,
+        "session_meta": session_meta,
+        "turns": read_turns(path),
+        "final_feedback": final_feedback
+    }
+    write_json_atomic(output_path, log_data)
+    # Logs with forks stay: they hold the shared prefix of other sessions
+    if os.path.exists(path) and not read_records(path, "fork"):
+        os.remove(path)
+    return log_data
+
+
+def _scan_max_log_number(log_dir: str) -> int:
+    max_num = 0
+    for entry in os.scandir(log_dir):
+        name = entry.name
+        if not name.startswith(LOG_PREFIX):
+            continue
+        part = name[len(LOG_PREFIX):].split(".", 1)[0]
+        if part.isdigit():
+            max_num = max(max_num, int(part))
+    return max_num
+
+
+def reserve_log_paths(log_dir: str) -> Tuple[str, str]:
+    """
+    Reserves the next log number in log_dir and returns (jsonl_path, json_path).
+    The last used number is kept in a small counter file; the directory is only
+    scanned once, when the counter does not exist yet.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    counter_path = os.path.join(log_dir, COUNTER_FILE)
+
+    last_num: Optional[int] = None
+    try:
+        with open(counter_path, "r", encoding="utf-8") as f:
+            last_num = int(f.read().strip())
+    except (OSError, ValueError):
+        last_num = _scan_max_log_number(log_dir)
+
+    num = last_num + 1
+    while True:
+        jsonl_path = os.path.join(log_dir, f"{LOG_PREFIX}{num}.jsonl")
+        json_path = os.path.join(log_dir, f"{LOG_PREFIX}{num}.json")
+        if os.path.exists(json_path):
+            num += 1
+            continue
+        try:
+            # O_EXCL: the number is claimed even if another process reserves concurrently
+            fd = os.open(jsonl_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            break
+        except FileExistsError:
+            num += 1
+
+    tmp_counter = f"{counter_path}.tmp"
+    with open(tmp_counter, "w", encoding="utf-8") as f:
+        f.write(str(num))
+    os.replace(tmp_counter, counter_path)
+
+    return jsonl_path, json_path
@@ -0,0 +1,299 @@
+"""
+Пул процессов-воркеров для сессий интервью: обход GIL для CPU-работы хода
+(валидация pydantic, сериализация ходов, сборка промптов) на нескольких ядрах.
+
+- Сессии шардируются по thread_id (crc32 % N): все ходы сессии идут в один и тот же воркер,
+  поэтому журнал ходов сессии пишет один процесс, а кэши воркера (промпты, кассета) остаются горячими.
+- Состояние после каждого хода сохраняется в общее хранилище (agent/session_store.py). Воркер берет
+  состояние оттуда, поэтому перезапуск воркера или всего пула не теряет сессии.
+- Воркер получает по одному запросу за раз; очередь каждого воркера живет в родительском процессе.
+  Если воркер упал, его ход завершается WorkerCrashed (состояние — последний сохраненный ход,
+  ход можно повторить — повторно записанный ход в журнале заменяет прежний, см. read_turns),
+  воркер перезапускается и продолжает очередь.
+- Лимиты провайдера (RATE_LIMIT_RPM / RATE_LIMIT_TPM) общие: каждый воркер получает 1/N квоты.
+- Для офлайн-прогонов запрос может указать свою кассету (cassette=путь, режим — cassette_mode пула):
+  воркер держит загруженные кассеты и включает нужную на время хода.
+
+    pool = WorkerPool(4)
+    pool.start(thread_id, initial_state).result()   # первый ход (банк вступлений или граф)
+    pool.turn(thread_id, "Мой ответ...").result()   # {"turn_id", "status", "reply", "final_feedback"}
+    pool.shutdown()
+
+Нагрузочный прогон: load_test.py.
+"""
+import multiprocessing
+import os
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from agent.session_store import STORE_PATH
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+MONITOR_INTERVAL = 1.0
+JOIN_TIMEOUT = 10.0
+FINISHED = ("stop_requested", "finished")
+
+
+class WorkerError(RuntimeError):
+    """The turn failed inside the worker (message carries the original exception)."""
+
+
+class WorkerCrashed(WorkerError):
+    """The worker process died during the turn; the session stays at the last saved turn."""
+
+
+def route(thread_id: str, workers: int) -> int:
+    """Sticky shard of a session."""
+    return zlib.crc32(thread_id.encode("utf-8")) % workers
+
+
+def _reply(state: Dict[str, Any]) -> Dict[str, Any]:
+    from langchain_core.messages import AIMessage
+
+    messages = state.get("messages") or []
+    last = messages[-1] if messages else None
+    return {
+        "turn_id": state.get("current_turn_id"),
+        "status": state.get("status"),
+        "reply": last.content if isinstance(last, AIMessage) else None,
+        "final_feedback": state.get("final_feedback"),
+    }
+
+
+def _worker_main(index: int, workers: int, conn, store_path: str, cassette_mode: str):
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+    # rate_limit читает лимиты при импорте: доля воркера задается до импорта agent.*
+    for name in ("RATE_LIMIT_RPM", "RATE_LIMIT_TPM"):
+        if float(os.getenv(name, "0")):
+            os.environ[name] = str(float(os.environ[name]) / workers)
+
+    from contextlib import nullcontext
+    from agent.cassette import Cassette, activate
+    from agent.graph import build_graph
+    from agent.nodes import get_interviewer_model, get_mentor_model
+    from agent.rate_limit import get_limiter
+    from agent.session_store import SessionStore
+    from agent.turn_log import close_log
+
+    app = build_graph()
+    # Клиенты моделей создаются до "ready": ленивая инициализация не попадает в первый ход воркера
+    try:
+        get_mentor_model()
+        get_interviewer_model()
+    except Exception:
+        pass  # без API_KEY ошибка проявится в ходе, а не падением воркера
+    store = SessionStore(store_path)
+    cassettes: Dict[str, Cassette] = {}
+    conn.send(("ready", None))
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        thread_id, kind, payload, cassette = request
+        config = {"configurable": {"thread_id": thread_id}}
+        try:
+            if cassette and cassette not in cassettes:
+                cassettes[cassette] = Cassette(cassette, cassette_mode)
+            with activate(cassettes[cassette]) if cassette else nullcontext():
+                state = _run_turn(app, store, thread_id, kind, payload, config)
+            store.save(thread_id, state, index)
+            if state.get("status") in FINISHED and state.get("turn_log_path"):
+                close_log(state["turn_log_path"])
+            limiter = get_limiter()
+            conn.send(("done", {**_reply(state), "rate_limit": limiter.stats() if limiter else None}))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+    store.close()
+
+
+def _run_turn(app, store, thread_id: str, kind: str, payload: Any, config: Dict[str, Any]) -> Dict[str, Any]:
+    from langchain_core.messages import HumanMessage
+    from agent.question_bank import serve_opening
+
+    if kind == "start":
+        state, use_bank = payload
+        return (serve_opening(state) if use_bank else None) or app.invoke(state, config=config)
+    state = store.load(thread_id)
+    if state is None:
+        raise KeyError(f"Сессия {thread_id} не найдена в {store.path}")
+    state["messages"].append(HumanMessage(content=payload))
+    return app.invoke(state, config=config)
+
+
+class WorkerPool:
+    """N worker processes with sticky routing by thread_id and a shared session store."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, store_path: str = STORE_PATH, cassette_mode: str = "replay"):
+        self.workers = workers
+        self.store_path = store_path
+        self.cassette_mode = cassette_mode
+        self.restarts = 0
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._procs: List[Any] = [None] * workers
+        self._conns: List[Any] = [None] * workers
+        self._ready = [threading.Event() for _ in range(workers)]
+        self._backlog: List[Deque[Tuple[Future, tuple]]] = [deque() for _ in range(workers)]
+        self._busy: List[Optional[Future]] = [None] * workers
+        self._failed: List[Optional[str]] = [None] * workers
+        self._rate_limit: List[Optional[Dict[str, Any]]] = [None] * workers
+        self._closing = False
+        for index in range(workers):
+            self._spawn(index)
+        self._collector = threading.Thread(target=self._collect, name="worker-pool", daemon=True)
+        self._collector.start()
+
+    def _spawn(self, index: int):
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main, args=(index, self.workers, child_conn, self.store_path, self.cassette_mode),
+            name=f"interview-worker-{index}", daemon=True
+        )
+        proc.start()
+        child_conn.close()
+        self._ready[index].clear()
+        self._procs[index], self._conns[index] = proc, parent_conn
+
+    def route(self, thread_id: str) -> int:
+        return route(thread_id, self.workers)
+
+    def pids(self) -> List[int]:
+        return [proc.pid for proc in self._procs]
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every worker has built its graph (startup is not counted as turn latency)."""
+        return all(event.wait(timeout) for event in self._ready) and not any(self._failed)
+
+    def start(self, thread_id: str, state: Dict[str, Any], use_bank: bool = True, cassette: Optional[str] = None) -> Future:
+        """First turn of a new session: opening from the question bank (use_bank) or a graph run."""
+        return self._submit(thread_id, "start", (state, use_bank), cassette)
+
+    def turn(self, thread_id: str, message: str, cassette: Optional[str] = None) -> Future:
+        return self._submit(thread_id, "turn", message, cassette)
+
+    def _submit(self, thread_id: str, kind: str, payload: Any, cassette: Optional[str]) -> Future:
+        future: Future = Future()
+        index = self.route(thread_id)
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("WorkerPool is shut down")
+            if self._failed[index]:
+                future.set_exception(WorkerCrashed(self._failed[index]))
+                return future
+            self._backlog[index].append((future, (thread_id, kind, payload, cassette)))
+            self._dispatch(index)
+        return future
+
+    def _dispatch(self, index: int):
+        """Sends the next request to an idle worker (caller holds the lock)."""
+        if self._busy[index] is None and self._backlog[index]:
+            future, request = self._backlog[index].popleft()
+            self._busy[index] = future
+            try:
+                self._conns[index].send(request)
+            except (BrokenPipeError, OSError):
+                pass  # воркер уже упал: ход завершит _restart
+
+    def _collect(self):
+        while True:
+            with self._lock:
+                if self._closing and not any(self._busy) and not any(self._backlog):
+                    return
+                live = [i for i in range(self.workers) if not self._failed[i]]
+                conns = {self._conns[i]: i for i in live}
+                sentinels = {self._procs[i].sentinel: i for i in live}
+            for ready in wait(list(conns) + list(sentinels), MONITOR_INTERVAL):
+                if ready in conns:
+                    if self._conns[conns[ready]] is ready:
+                        self._receive(conns[ready])
+                elif self._procs[sentinels[ready]].sentinel == ready:
+                    self._restart(sentinels[ready])
+
+    def _receive(self, index: int) -> bool:
+        try:
+            event, payload = self._conns[index].recv()
+        except (EOFError, OSError):
+            return False  # процесс завершился — обработает _restart по sentinel
+        if event == "ready":
+            self._ready[index].set()
+            return True
+        with self._lock:
+            future, self._busy[index] = self._busy[index], None
+            self._dispatch(index)
+        if future is not None:
+            if event == "done":
+                self._rate_limit[index] = payload.pop("rate_limit", None)
+                future.set_result(payload)
+            else:
+                future.set_exception(WorkerError(payload))
+        return True
+
+    def _restart(self, index: int):
+        # Ответ, отправленный до смерти процесса, еще может лежать в канале
+        while self._conns[index].poll() and self._receive(index):
+            pass
+        with self._lock:
+            lost = [self._busy[index]]
+            self._busy[index] = None
+            self._procs[index].join()
+            exitcode = self._procs[index].exitcode
+            self._conns[index].close()
+            if self._ready[index].is_set():
+                message = f"Воркер {index} завершился во время хода (код {exitcode})"
+                self.restarts += 1
+                self._spawn(index)
+                self._dispatch(index)
+            else:
+                # Упал еще при запуске (импорт, конфигурация) — перезапуск повторил бы падение
+                message = f"Воркер {index} не запустился (код {exitcode})"
+                self._failed[index] = message
+                self._ready[index].set()
+                lost += [future for future, _ in self._backlog[index]]
+                self._backlog[index].clear()
+        for future in lost:
+            if future is not None:
+                future.set_exception(WorkerCrashed(message))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "restarts": self.restarts,
+                "busy": sum(f is not None for f in self._busy),
+                "queued": [len(q) for q in self._backlog],
+                # Лимитер свой в каждом воркере: последняя сводка stats() по воркерам (None — лимиты не заданы)
+                "rate_limit": list(self._rate_limit),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers after the queued turns (wait=True) or cancels the queue."""
+        with self._lock:
+            self._closing = True
+            if not wait:
+                for backlog in self._backlog:
+                    while backlog:
+                        backlog.popleft()[0].cancel()
+        self._collector.join()
+        for conn, proc in zip(self._conns, self._procs):
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            proc.join(JOIN_TIMEOUT)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -6,6 +6,9 @@ import uuid
 import json
 from langchain_core.messages import HumanMessage, AIMessage
 from agent.graph import build_graph
+from agent.turn_log import start_log, finalize_log
+from agent.question_bank import serve_opening
+from agent.background import TurnJob
 
 # Page configuration
 st.set_page_config(page_title="Multi-Agent Interview Coach", page_icon="👨‍💻")
@@ -59,6 +62,128 @@ def format_feedback_to_markdown(feedback_dict):
         
     return md
 
+HISTORY_WINDOW = 20      # сообщений чата на экране, более ранние — по кнопке
+TURNS_PAGE_SIZE = 5      # ходов на странице во вкладке мыслей
+
+NODE_LABELS = {
+    "budget_node": "💰 Бюджет сессии проверен",
+    "fast_path_node": "⚡ Быстрый путь (без LLM)",
+    "mentor_node": "🧭 Ментор проанализировал ответ",
+    "interviewer_node": "🎤 Интервьюер сформулировал реплику",
+    "logger_node": "📝 Ход записан в лог",
+    "memory_update_node": "🧠 Память (summary) обновлена",
+    "reporting_node": "📊 Финальный отчет готов",
+    "prefetch_node": "🔮 Следующая реплика готовится заранее",
+}
+
+def render_chat_history():
+    """Renders only the last history_shown messages, so a rerun does not grow with the interview."""
+    messages = st.session_state.messages
+    shown = st.session_state.history_shown
+    hidden = len(messages) - shown
+    if hidden > 0:
+        if st.button(f"Показать более ранние сообщения ({hidden})"):
+            st.session_state.history_shown += HISTORY_WINDOW
+            st.rerun()
+    for msg in messages[-shown:]:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+def render_turns(turns):
+    """One page of turn expanders, newest first."""
+    total = len(turns)
+    if not total:
+        return
+    pages = (total + TURNS_PAGE_SIZE - 1) // TURNS_PAGE_SIZE
+    page = 1
+    if pages > 1:
+        page = st.number_input("Страница", min_value=1, max_value=pages, value=1, step=1)
+    end = total - (page - 1) * TURNS_PAGE_SIZE
+    start = max(end - TURNS_PAGE_SIZE, 0)
+    for t in reversed(turns[start:end]):
+         with st.expander(f"Turn {t.get('turn_id', '?')}"):
+             st.text(t.get('internal_thoughts') or 'No thoughts')
+             st.markdown(f"**User:** {t.get('user_message')}")
+             st.markdown(f"**System:** {t.get('agent_visible_message')}")
+
+def graph_config():
+    return {"configurable": {"thread_id": st.session_state.thread_id}}
+
+def start_turn(state):
+    """Runs the graph for one turn on the background executor."""
+    st.session_state.job = TurnJob(build_graph(), state, graph_config())
+
+def job_running():
+    """A turn is in flight: still running, or finished but not yet applied by finish_job()."""
+    return st.session_state.get("job") is not None
+
+def apply_turn_result(new_state):
+    """Moves a finished graph run into session state (reply, final report, log)."""
+    st.session_state.graph_state = new_state
+    
+    # UI keeps its own copy of the turn history, one appended turn per graph run
+    last_turn = new_state.get("last_turn")
+    known = st.session_state.turns[-1]["turn_id"] if st.session_state.turns else 0
+    if last_turn and last_turn["turn_id"] > known:
+        st.session_state.turns.append(last_turn)
+    
+    if new_state.get("status") in ["stop_requested", "finished"]:
+         # Check if we have final report
+        if new_state.get("final_feedback"):
+            try:
+                feedback_dict = json.loads(new_state["final_feedback"])
+                # Save raw report for download
+                new_state['final_feedback_raw'] = feedback_dict
+                
+                report_md = format_feedback_to_markdown(feedback_dict)
+                st.session_state.final_report = report_md
+                
+                try:
+                    finalize_log(
+                        new_state["turn_log_path"],
+                        "interview_log.json",
+                        new_state.get("participant_name", "Unknown"),
+                        feedback_dict,
+                        new_state.get("session_meta")
+                    )
+                    st.success("Лог сохранен в 'interview_log.json'")
+                except Exception as e:
+                    st.error(f"Ошибка сохранения лога: {e}")
+                
+            except Exception as e:
+                st.error(f"Ошибка чтения отчета: {e}")
+                st.session_state.final_report = "Ошибка генерации отчета."
+        
+        last_msg = new_state["messages"][-1]
+        if isinstance(last_msg, AIMessage) and not st.session_state.final_report:
+             st.session_state.messages.append({"role": "assistant", "content": last_msg.content})
+        
+        st.session_state.interview_active = False
+    else:
+        last_msg = new_state["messages"][-1]
+        if isinstance(last_msg, AIMessage):
+            st.session_state.messages.append({"role": "assistant", "content": last_msg.content})
+
+def submit_prompt(prompt):
+    st.session_state.messages.append({"role": "user", "content": prompt})
+    current_state = st.session_state.graph_state
+    current_state["messages"].append(HumanMessage(content=prompt))
+    start_turn(current_state)
+
+def finish_job():
+    """Applies a finished background run and sends the prompt queued while it was running."""
+    job = st.session_state.job
+    st.session_state.job = None
+    try:
+        apply_turn_result(job.outcome())
+    except Exception as e:
+        st.error(f"Ошибка выполнения хода: {e}")
+    
+    # Stop requested while the turn was running
+    if st.session_state.pending_prompt and st.session_state.interview_active:
+        submit_prompt(st.session_state.pending_prompt)
+    st.session_state.pending_prompt = None
+
 # Initialize Session State
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -70,6 +195,18 @@ if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
 if "final_report" not in st.session_state:
     st.session_state.final_report = None
+if "job" not in st.session_state:
+    st.session_state.job = None
+if "pending_prompt" not in st.session_state:
+    st.session_state.pending_prompt = None
+if "turns" not in st.session_state:
+    st.session_state.turns = []
+if "history_shown" not in st.session_state:
+    st.session_state.history_shown = HISTORY_WINDOW
+
+# Finished background run -> apply its result before rendering
+if st.session_state.job is not None and st.session_state.job.done:
+    finish_job()
 
 st.title("👨‍💻 Multi-Agent Interview Coach")
 
@@ -83,6 +220,10 @@ with st.sidebar:
         experience = st.text_area("Опыт", value="Нет опыта")
         
         if st.button("Начать интервью"):
+            # Turns are streamed per session, so parallel sessions don't share a file
+            turn_log_path = f"interview_log.{st.session_state.thread_id}.jsonl"
+            start_log(turn_log_path)
+            
             # Initialize Graph State
             initial_state_config = {
                 "participant_name": name,
@@ -92,8 +233,8 @@ with st.sidebar:
                     "experience": experience
                 },
                 "messages": [],
-                "turns": [],
                 "current_turn_id": 0,
+                "turn_log_path": turn_log_path,
                 "status": "active",
                 "summary": "Начало интервью.",
                 "mentor_directive": "Начни интервью с представления себя и задай первый релевантный вопрос.",
@@ -103,19 +244,14 @@ with st.sidebar:
                 "last_interviewer_question": ""
             }
             
-            app = build_graph()
-            config = {"configurable": {"thread_id": st.session_state.thread_id}}
             initial_state = {**initial_state_config, "messages": [HumanMessage(content="Здравствуйте, я готов к интервью.")]}
             
-            with st.spinner("Генерация первого вопроса..."):
-                current_state = app.invoke(initial_state, config=config)
-            
-            st.session_state.graph_state = current_state
-            
-            if current_state["messages"]:
-                last_msg = current_state["messages"][-1]
-                if isinstance(last_msg, AIMessage):
-                    st.session_state.messages.append({"role": "assistant", "content": last_msg.content})
+            current_state = serve_opening(initial_state)
+            if current_state is None:
+                st.session_state.graph_state = initial_state
+                start_turn(initial_state)
+            else:
+                apply_turn_result(current_state)
             
             st.session_state.interview_active = True
             st.rerun()
@@ -133,6 +269,28 @@ if st.session_state.get("stop_trigger"):
     prompt_text = "Stop interview"
     st.session_state.stop_trigger = False # Reset flag
 
+@st.fragment(run_every=0.5)
+def turn_progress():
+    """Live node-by-node progress of the running turn; applies the result and reruns the app once it is done."""
+    job = st.session_state.job
+    if job is None:
+        return
+    if job.done:
+        # Ход мог завершиться между проверкой в начале скрипта и отрисовкой — результат применяет сам фрагмент
+        finish_job()
+        st.rerun(scope="app")
+    
+    updates = job.progress()
+    with st.status("Интервьюер думает...", expanded=True):
+        for node, _ in updates:
+            st.write(NODE_LABELS.get(node, node))
+    
+    for node, update in updates:
+        if update.get("mentor_thoughts") and node == "mentor_node":
+            st.info(f"**Mentor (Observer):**\n\n{update['mentor_thoughts']}")
+        if update.get("interviewer_thoughts") and node == "interviewer_node":
+            st.success(f"**Interviewer:**\n\n{update['interviewer_thoughts']}")
+
 # Main Chat Interface
 if st.session_state.final_report:
     st.markdown(st.session_state.final_report)
@@ -156,14 +314,15 @@ elif st.session_state.interview_active:
     tab1, tab2 = st.tabs(["💬 Диалог", "🧠 Мысли Агентов"])
     
     with tab1:
-        # Display chat history
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]):
-                st.markdown(msg["content"])
+        # Display chat history (last messages only)
+        render_chat_history()
         
     with tab2:
         st.subheader("Внутренние мысли агентов (Real-time)")
-        if st.session_state.graph_state:
+        if job_running():
+            # Fills in as mentor_node, interviewer_node, ... finish
+            turn_progress()
+        elif st.session_state.graph_state:
             # Display current thoughts
             col1, col2 = st.columns(2)
             with col1:
@@ -171,86 +330,29 @@ elif st.session_state.interview_active:
             with col2:
                 st.success(f"**Interviewer:**\n\n{st.session_state.graph_state.get('interviewer_thoughts', 'Wait...')}")
             
+        if st.session_state.graph_state:
             st.divider()
             st.markdown("### История ходов (Turns)")
-            turns = st.session_state.graph_state.get("turns", [])
-            for t in reversed(turns):
-                 with st.expander(f"Turn {t.get('turn_id', '?')}"):
-                     st.text(t.get('internal_thoughts', 'No thoughts'))
-                     st.markdown(f"**User:** {t.get('user_message')}")
-                     st.markdown(f"**System:** {t.get('agent_visible_message')}")
+            render_turns(st.session_state.turns)
     
-    chat_input_val = st.chat_input("Ваш ответ...")
+    if job_running():
+        with tab1:
+            # Progress itself is polled by the fragment in the thoughts tab
+            st.caption("⏳ Интервьюер думает... Ход агентов виден во вкладке «Мысли Агентов».")
+    
+    chat_input_val = st.chat_input("Ваш ответ...", disabled=job_running())
     
     # Priority: Button Stop -> Chat Input
     prompt = prompt_text if prompt_text else chat_input_val
     
     if prompt:
-        with tab1:
-            # 1. Add User Message
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-
-            # 2. Invoke Graph
-            app = build_graph()
-            config = {"configurable": {"thread_id": st.session_state.thread_id}}
-            
-            # Prepare state update
-            current_state = st.session_state.graph_state
-            current_state["messages"].append(HumanMessage(content=prompt))
-            
-            with st.spinner("Интервьюер думает..."):
-                new_state = app.invoke(current_state, config=config)
-            
-            st.session_state.graph_state = new_state
-            
-            # 3. Handle Response
-            if new_state.get("status") in ["stop_requested", "finished"]:
-                 # Check if we have final report
-                if new_state.get("final_feedback"):
-                    try:
-                        feedback_dict = json.loads(new_state["final_feedback"])
-                        # Save raw report for download
-                        new_state['final_feedback_raw'] = feedback_dict
-                        
-                        report_md = format_feedback_to_markdown(feedback_dict)
-                        st.session_state.final_report = report_md
-                        
-                        log_data = {
-                            "participant_name": new_state.get("participant_name", "Unknown"),
-                            "turns": new_state.get("turns", []),
-                            "final_feedback": feedback_dict
-                        }
-                        try:
-                            with open("interview_log.json", "w", encoding="utf-8") as f:
-                                json.dump(log_data, f, indent=2, ensure_ascii=False)
-                            st.success("Лог сохранен в 'interview_log.json'")
-                        except Exception as e:
-                            st.error(f"Ошибка сохранения лога: {e}")
-                        # ------------------------------------
-                        
-                    except Exception as e:
-                        st.error(f"Ошибка чтения отчета: {e}")
-                        st.session_state.final_report = "Ошибка генерации отчета."
-                
-                last_msg = new_state["messages"][-1]
-                if isinstance(last_msg, AIMessage) and not st.session_state.final_report:
-                     st.session_state.messages.append({"role": "assistant", "content": last_msg.content})
-                     with st.chat_message("assistant"):
-                        st.markdown(last_msg.content)
-                
-                st.session_state.interview_active = False
-                st.rerun()
-                
-            else:
-                last_msg = new_state["messages"][-1]
-                if isinstance(last_msg, AIMessage):
-                    st.session_state.messages.append({"role": "assistant", "content": last_msg.content})
-                    with st.chat_message("assistant"):
-                        st.markdown(last_msg.content)
-                
-                st.rerun()
+        if job_running():
+            # Turn in progress: send the stop command as soon as it finishes
+            st.session_state.pending_prompt = prompt
+            st.toast("Интервью завершится после текущего хода.")
+        else:
+            submit_prompt(prompt)
+            st.rerun()
 
 else:
     st.info("👈 Пожалуйста, заполните данные слева и нажмите 'Начать интервью'")
@@ -1,12 +1,15 @@
 from dotenv import load_dotenv
 load_dotenv('.env')
+import argparse
 import time
 import os
 import json
-import glob
 import uuid
 from langchain_core.messages import HumanMessage, AIMessage
 from agent.graph import build_graph
+from agent.turn_log import reserve_log_paths, finalize_log
+from agent.question_bank import serve_opening
+from agent.profiler import TurnProfiler, profile_turn
 import yaml
 
 USER_INPUT_FILE = "user_input.txt"
@@ -14,20 +17,8 @@ SYSTEM_OUTPUT_FILE = "system_output.txt"
 LOG_DIR = "./logs" 
 
 def get_next_log_filename():
-    """Finds the next available case number for logging in LOG_DIR."""
-    os.makedirs(LOG_DIR, exist_ok=True)
-    existing_logs = glob.glob(os.path.join(LOG_DIR, "interview_log_*.json"))
-    max_num = 0
-    for log in existing_logs:
-        try:
-            part = os.path.basename(log).replace("interview_log_", "").replace(".json", "")
-            if part.isdigit():
-                num = int(part)
-                if num > max_num:
-                    max_num = num
-        except:
-            pass
-    return os.path.join(LOG_DIR, f"interview_log_{max_num + 1}.json")
+    """Reserves the next case number in LOG_DIR. Returns (turn stream .jsonl, final .json)."""
+    return reserve_log_paths(LOG_DIR)
 
 def read_and_clear_input():
     """Reads content from user_input.txt and clears it if not empty."""
@@ -99,7 +90,14 @@ def format_feedback_to_text(feedback_dict):
         
     return "\n".join(lines)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Файловый отладочный раннер интервью.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Сэмплирующий профиль каждого хода (CPU / ожидание I/O, folded-стеки) рядом с логом")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("=== Debug Runner Started ===")
     print(f"Monitoring {USER_INPUT_FILE} for input...")
     print(f"Responses will be written to {SYSTEM_OUTPUT_FILE}")
@@ -113,6 +111,9 @@ def main():
     experience = user_config["user_info"]["experience"]
     print(f"Session Config: {name} | {position} | {grade}")
 
+    turn_log_path, log_filename = get_next_log_filename()
+    print(f"Turns are streamed to: {turn_log_path}")
+
     initial_state_config = {
         "participant_name": name,
         "session_meta": {
@@ -121,8 +122,8 @@ def main():
             "experience": experience
         },
         "messages": [],
-        "turns": [],
         "current_turn_id": 0,
+        "turn_log_path": turn_log_path,
         "status": "active",
         "summary": "Начало интервью.",
         "mentor_directive": "Начни интервью с представления себя и задай первый релевантный вопрос.",
@@ -133,12 +134,18 @@ def main():
     }
 
     app = build_graph()
+    profiler = TurnProfiler(log_filename) if args.profile else None
+    if profiler:
+        print(f"Profiling turns to: {profiler.out_dir}")
     thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
     
     # Initial Greeting
     initial_state = {**initial_state_config, "messages": [HumanMessage(content="Я готов начать интервью.")]}
-    current_state = app.invoke(initial_state, config=config)
+    current_state = serve_opening(initial_state)
+    if current_state is None:
+        with profile_turn(profiler, "opening"):
+            current_state = app.invoke(initial_state, config=config)
     
     # Write initial greeting
     if current_state["messages"]:
@@ -157,7 +164,8 @@ def main():
         if user_input:
             print(f"\n[User Input Received]: {user_input}")
             current_state["messages"].append(HumanMessage(content=user_input))
-            current_state = app.invoke(current_state, config=config)
+            with profile_turn(profiler, f"turn {current_state.get('current_turn_id', 0) + 1}"):
+                current_state = app.invoke(current_state, config=config)
             if current_state.get("status") in ["stop_requested", "finished"]:
                 break
             last_msg = current_state["messages"][-1]
@@ -172,24 +180,20 @@ def main():
         write_output(last_msg.content)
         
     if current_state.get("final_feedback"):
-        log_filename = get_next_log_filename()
         try:
             feedback_dict = json.loads(current_state["final_feedback"])
             feedback_str = format_feedback_to_text(feedback_dict)
-            log_data = {
-                "participant_name": name,
-                "turns": current_state.get("turns", []),
-                "final_feedback": feedback_str  # formatted text
-            }
-            with open(log_filename, "w", encoding="utf-8") as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            finalize_log(turn_log_path, log_filename, name, feedback_str, current_state.get("session_meta"))  # formatted text
             print(f"Log saved to: {log_filename}")
             write_output(f"INTERVIEW FINISHED. Log saved to {log_filename}")
         except Exception as e:
             print(f"Error saving log: {e}")
             write_output(f"Error saving log: {e}")
     else:
-        print("No final feedback generated.")
+        print(f"No final feedback generated. Turns kept in {turn_log_path}")
+    
+    if profiler:
+        profiler.close()
         
 if __name__ == "__main__":
     main()
\ No newline at end of file
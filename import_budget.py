@@ -0,0 +1,137 @@
+"""
+Бюджет холодного старта: время импорта модулей точек входа (main.py, app.py, debug_runner.py).
+
+Для каждого скрипта берутся импорты верхнего уровня (без выполнения самого скрипта) и запускаются
+в отдельном процессе под `python -X importtime`. Время — сумма cumulative-времени импортов верхнего уровня,
+из нескольких прогонов берется минимальное.
+
+Жесткая проверка — только утечка тяжелых клиентов (LAZY_MODULES) в старт: модели и поиск создаются
+при первом вызове (get_*_model / get_search_tool в agent/nodes.py). Абсолютные миллисекунды зависят
+от машины и ее загрузки, поэтому время сравнивается с эталоном, замеренным в том же прогоне
+(голый `import langchain_core`, прогоны чередуются со скриптом): в import_budget.json хранится
+допустимое отношение "скрипт / эталон". Превышение — предупреждение, с --strict — ошибка.
+
+    python import_budget.py              # код выхода 1 при утечке ленивых модулей
+    python import_budget.py --top 15     # плюс самые тяжелые пакеты
+    python import_budget.py --strict     # ошибка и при превышении отношения
+    python import_budget.py --update     # записать текущие отношения (+ запас HEADROOM) как новый бюджет
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+
+SCRIPTS = ["main.py", "app.py", "debug_runner.py"]
+BUDGET_FILE = "import_budget.json"
+DEFAULT_RUNS = 3
+HEADROOM = 1.25
+LAZY_MODULES = ("openai", "langchain_openai", "langchain_community")
+BASELINE_CODE = "import langchain_core"
+
+
+def startup_imports(script: str) -> str:
+    """Top-level import statements of the script as a single code string."""
+    with open(script, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script)
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in nodes)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Entries of `-X importtime` output: (module, depth, cumulative us)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative)))
+    return entries
+
+
+def run_once(code: str, label: str) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{label}: импорт завершился ошибкой\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+    return {"total_us": sum(us for _, depth, us in entries if depth == 0), "entries": entries}
+
+
+def measure(script: str, runs: int) -> Tuple[Dict, int]:
+    """Best run of the script and of the baseline; runs alternate so both see the same machine load."""
+    code = startup_imports(script)
+    best, baseline = None, None
+    for _ in range(runs):
+        current = run_once(code, script)
+        if best is None or current["total_us"] < best["total_us"]:
+            best = current
+        reference = run_once(BASELINE_CODE, "эталон")["total_us"]
+        baseline = reference if baseline is None else min(baseline, reference)
+    return best, baseline
+
+
+def heaviest(entries, top: int) -> List[Tuple[str, int]]:
+    """Heaviest top-level packages (cumulative time of the root package)."""
+    packages = Counter()
+    for name, depth, us in entries:
+        if depth == 0:
+            packages[name.split(".")[0]] += us
+    return packages.most_common(top)
+
+
+def load_budget(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта точек входа против бюджета холодного старта.")
+    parser.add_argument("scripts", nargs="*", default=SCRIPTS, metavar="SCRIPT")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Прогонов на скрипт (берется минимум)")
+    parser.add_argument("--top", type=int, default=0, help="Показать N самых тяжелых пакетов")
+    parser.add_argument("--budget", default=BUDGET_FILE)
+    parser.add_argument("--strict", action="store_true", help="Превышение отношения к эталону — ошибка")
+    parser.add_argument("--update", action="store_true", help="Записать текущие отношения как бюджет")
+    args = parser.parse_args()
+
+    budget = load_budget(args.budget)
+    failed = False
+    for script in args.scripts:
+        result, baseline = measure(script, args.runs)
+        ms, ratio = result["total_us"] / 1000, result["total_us"] / max(baseline, 1)
+        limit = budget.get(script)
+        leaked = sorted({name.split(".")[0] for name, _, _ in result["entries"]} & set(LAZY_MODULES))
+        over = limit is not None and ratio > limit
+        status = "нет бюджета" if limit is None else ("ПРЕВЫШЕН" if over else "ok")
+        print(f"{script:<16} {ms:8.0f} ms   x{ratio:5.2f} эталона ({baseline / 1000:.0f} ms)   "
+              f"бюджет {f'x{limit}' if limit is not None else '-':>6}   {status}")
+        if leaked:
+            print(f"    ОШИБКА: на старте импортируются ленивые модули: {', '.join(leaked)}")
+            failed = True
+        for package, us in heaviest(result["entries"], args.top):
+            print(f"    {package:<28} {us / 1000:8.0f} ms")
+        if args.update:
+            budget[script] = math.ceil(ratio * HEADROOM * 10) / 10
+        elif over and args.strict:
+            failed = True
+
+    if args.update:
+        with open(args.budget, "w", encoding="utf-8") as f:
+            json.dump(budget, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Бюджет записан в {args.budget}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
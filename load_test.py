@@ -0,0 +1,141 @@
+"""
+Нагрузочный прогон пула воркеров (agent/workers.py) на сценариях из logs/.
+
+Каждая сессия повторяет свой сценарий на его кассете (cassettes/interview_log_N.json, записывается
+replay_scenarios.py --mode record; в репозиторий не входит, без кассет прогон пропускается) в strict-режиме: сеть не нужна, время хода — собственная работа процесса (граф, валидация pydantic,
+JSON, сборка промптов). S сессий идут одновременно:
+
+    python load_test.py                           # 1, 2 и 4 воркера, 16 сессий
+    python load_test.py --workers 1,4,8 --sessions 64
+    python load_test.py --lean                    # кассеты LEAN_PROMPTS=1
+
+Для каждого числа воркеров печатаются ходы/с, p50 / p95 задержки хода (с ожиданием в очереди воркера)
+и ускорение относительно первого прогона.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from replay_scenarios import LOG_DIR, CASSETTE_DIR, STOP_MESSAGE, load_scenarios, initial_state, candidate_messages
+
+DEFAULT_WORKERS = "1,2,4"
+DEFAULT_SESSIONS = 16
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def run_load(workers: int, scenarios, sessions: int, tmp: str):
+    """Runs `sessions` concurrent scenario sessions on a fresh pool, returns the metrics."""
+    from agent.workers import WorkerPool, FINISHED
+    from agent.rate_limit import merge_stats
+
+    pool = WorkerPool(workers, store_path=os.path.join(tmp, f"sessions-{workers}.sqlite"), cassette_mode="strict")
+    pool.wait_ready()
+    plans, cassettes, futures = {}, {}, {}
+    latencies, errors, finished = [], [], 0
+    started = time.perf_counter()
+    for i in range(sessions):
+        _, data, cassette = scenarios[i % len(scenarios)]
+        thread_id = f"load-{workers}-{i}"
+        plans[thread_id], cassettes[thread_id] = candidate_messages(data), cassette
+        state = initial_state(data, os.path.join(tmp, f"{thread_id}.jsonl"))
+        # Вступление из банка не берется: ответы должны совпасть с записанными в кассету
+        futures[pool.start(thread_id, state, use_bank=False, cassette=cassette)] = (thread_id, time.perf_counter())
+
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            thread_id, submitted = futures.pop(future)
+            latencies.append(time.perf_counter() - submitted)
+            try:
+                reply = future.result()
+            except Exception as e:
+                errors.append(f"{thread_id}: {type(e).__name__}: {e}")
+                continue
+            if reply["status"] in FINISHED:
+                if reply.get("final_feedback"):
+                    finished += 1
+                else:
+                    errors.append(f"{thread_id}: нет final_feedback")
+                continue
+            plan = plans[thread_id]
+            message = plan.pop(0) if plan else STOP_MESSAGE
+            futures[pool.turn(thread_id, message, cassettes[thread_id])] = (thread_id, time.perf_counter())
+
+    elapsed = time.perf_counter() - started
+    pool_stats = pool.stats()
+    pool.shutdown()
+    return {
+        "workers": workers,
+        "sessions": sessions,
+        "finished": finished,
+        "turns": len(latencies),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "restarts": pool_stats["restarts"],
+        "rate_limit": merge_stats(pool_stats["rate_limit"]) if any(pool_stats["rate_limit"]) else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон пула воркеров на кассетах сценариев.")
+    parser.add_argument("--workers", default=DEFAULT_WORKERS, help="Числа воркеров через запятую")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Одновременных сессий")
+    parser.add_argument("--logs", default=LOG_DIR)
+    parser.add_argument("--cassettes", default=CASSETTE_DIR)
+    parser.add_argument("--lean", action="store_true", help="Прогон в LEAN_PROMPTS=1 (свои кассеты)")
+    parser.add_argument("scenarios", nargs="*", help="Имена логов, например interview_log_1.json")
+    args = parser.parse_args()
+
+    # Воркеры наследуют окружение: режим промптов задается до их запуска
+    os.environ["LEAN_PROMPTS"] = "1" if args.lean else "0"
+    os.environ.setdefault("API_KEY", "offline-replay")
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+    from agent.rate_limit import format_stats
+
+    suffix = ".lean" if args.lean else ""
+    scenarios = []
+    for name, data in load_scenarios(args.logs, set(args.scenarios)):
+        cassette = os.path.abspath(os.path.join(args.cassettes, name.replace(".json", f"{suffix}.json")))
+        if os.path.exists(cassette):
+            scenarios.append((name, data, cassette))
+    if not scenarios:
+        # Кассеты в репозиторий не входят: на чистой копии прогон пропускается, а не падает
+        print(f"Нет сценариев с кассетами в {args.cassettes} — прогон пропущен. "
+              f"Кассеты записываются один раз с доступом к API: python replay_scenarios.py --mode record")
+        return
+    worker_counts = [int(n) for n in args.workers.split(",")]
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Сценариев: {len(scenarios)}, сессий: {args.sessions}, CPU: {os.cpu_count()}")
+        baseline = None
+        for workers in worker_counts:
+            result = run_load(workers, scenarios, args.sessions, tmp)
+            baseline = baseline or result
+            speedup = result["throughput"] / baseline["throughput"] if baseline["throughput"] else 0.0
+            efficiency = speedup / (workers / baseline["workers"])
+            print(f"воркеров {workers}: {result['turns']} ходов за {result['elapsed']:.1f}s, "
+                  f"{result['throughput']:.1f} ходов/с, p50 {result['p50']:.2f}s, p95 {result['p95']:.2f}s, "
+                  f"ускорение x{speedup:.2f} ({efficiency:.0%}), завершено {result['finished']}/{result['sessions']}, "
+                  f"перезапусков {result['restarts']}, ошибок {len(result['errors'])}")
+            if result["rate_limit"]:
+                print(f"    очередь лимитера: {format_stats(result['rate_limit'])}")
+            for error in result["errors"][:5]:
+                print(f"    {error}")
+            failed = failed or bool(result["errors"])
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Индекс архива интервью (logs/interview_log_N.json) в локальной SQLite базе с полнотекстовым поиском.
+
+Примеры:
+    python log_index.py index
+    python log_index.py search "Kubernetes networking" --field gaps
+    python log_index.py search --raw "kube* NEAR network*"
+    python log_index.py stats --position QA --grade Middle
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+LOG_DIR = "./logs"
+DB_PATH = os.path.join(LOG_DIR, "index.sqlite")
+LOG_NAME_RE = re.compile(r"^interview_log_(\d+)\.json$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    interview_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS interviews (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    participant_name TEXT,
+    position TEXT,
+    grade_target TEXT,
+    grade TEXT,
+    hiring_recommendation TEXT,
+    confidence_score REAL,
+    turn_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS turns (
+    interview_id INTEGER NOT NULL,
+    turn_id INTEGER,
+    agent_visible_message TEXT,
+    user_message TEXT,
+    internal_thoughts TEXT
+);
+CREATE TABLE IF NOT EXISTS skills (interview_id INTEGER NOT NULL, skill TEXT);
+CREATE TABLE IF NOT EXISTS gaps (interview_id INTEGER NOT NULL, gap TEXT);
+CREATE INDEX IF NOT EXISTS idx_turns_interview ON turns(interview_id);
+CREATE INDEX IF NOT EXISTS idx_skills_interview ON skills(interview_id);
+CREATE INDEX IF NOT EXISTS idx_gaps_interview ON gaps(interview_id);
+CREATE INDEX IF NOT EXISTS idx_interviews_grade ON interviews(grade_target, position);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    field UNINDEXED,
+    interview_id UNINDEXED,
+    turn_id UNINDEXED,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+FIELDS = ["turns", "skills", "gaps", "feedback"]
+
+
+def connect(db_path=DB_PATH):
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _list_section(text, header):
+    """Extracts '  - item' lines that follow a header in the formatted text report."""
+    items = []
+    start = text.find(header)
+    if start == -1:
+        return items
+    for line in text[start + len(header):].splitlines()[1:]:
+        line = line.strip()
+        if not line.startswith("- "):
+            break
+        items.append(line[2:].strip())
+    return items
+
+
+def _match(pattern, text):
+    m = re.search(pattern, text)
+    return m.group(1).strip() if m else None
+
+
+def parse_feedback(feedback):
+    """
+    Normalizes final_feedback into a dict. Logs from main.py/debug_runner.py store
+    the formatted text report, app.py stores the raw FinalFeedback dict.
+    """
+    if isinstance(feedback, dict):
+        return feedback
+    if not isinstance(feedback, str):
+        return {}
+
+    try:
+        parsed = json.loads(feedback)
+        if isinstance(parsed, dict):
+            return parsed
+    except ValueError:
+        pass
+
+    confidence = _match(r"Уверенность:\s*([\d.]+)", feedback)
+    return {
+        "grade": _match(r"Грейд:\s*(.+)", feedback),
+        "hiring_recommendation": _match(r"Рекомендация:\s*(.+)", feedback),
+        "confidence_score": float(confidence) if confidence else None,
+        "confirmed_skills": _list_section(feedback, "Подтвержденные навыки:"),
+        "knowledge_gaps": _list_section(feedback, "Пробелы в знаниях:"),
+    }
+
+
+def _feedback_text(feedback):
+    return feedback if isinstance(feedback, str) else json.dumps(feedback, ensure_ascii=False)
+
+
+def _delete_interview(conn, interview_id):
+    for table in ("turns", "skills", "gaps"):
+        conn.execute(f"DELETE FROM {table} WHERE interview_id = ?", (interview_id,))
+    conn.execute("DELETE FROM search WHERE interview_id = ?", (interview_id,))
+    conn.execute("DELETE FROM interviews WHERE id = ?", (interview_id,))
+
+
+def _index_file(conn, path, interview_id):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    meta = data.get("session_meta") or {}
+    raw_feedback = data.get("final_feedback")
+    feedback = parse_feedback(raw_feedback)
+    turns = data.get("turns", [])
+
+    conn.execute(
+        "INSERT INTO interviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            interview_id, path, data.get("participant_name"),
+            meta.get("position"), meta.get("grade_target"),
+            feedback.get("grade"), feedback.get("hiring_recommendation"),
+            feedback.get("confidence_score"), len(turns)
+        )
+    )
+
+    conn.executemany(
+        "INSERT INTO turns VALUES (?, ?, ?, ?, ?)",
+        [(interview_id, t.get("turn_id"), t.get("agent_visible_message"), t.get("user_message"),
+          t.get("internal_thoughts")) for t in turns]
+    )
+    skills = feedback.get("confirmed_skills") or []
+    gaps = feedback.get("knowledge_gaps") or []
+    conn.executemany("INSERT INTO skills VALUES (?, ?)", [(interview_id, s) for s in skills])
+    conn.executemany("INSERT INTO gaps VALUES (?, ?)", [(interview_id, g) for g in gaps])
+
+    rows = [("turns", interview_id, t.get("turn_id"),
+             "\n".join(filter(None, [t.get("agent_visible_message"), t.get("user_message"), t.get("internal_thoughts")])))
+            for t in turns]
+    rows += [("skills", interview_id, None, s) for s in skills]
+    rows += [("gaps", interview_id, None, g) for g in gaps]
+    if raw_feedback:
+        rows.append(("feedback", interview_id, None, _feedback_text(raw_feedback)))
+    conn.executemany("INSERT INTO search VALUES (?, ?, ?, ?)", rows)
+
+
+def index_logs(log_dir=LOG_DIR, db_path=DB_PATH):
+    """
+    Incrementally indexes interview_log_N.json files: only new or changed files
+    (by mtime/size) are reindexed, deleted files are dropped from the index.
+    A malformed file is skipped (and retried on the next run) without aborting the others.
+    Returns (indexed, removed, unchanged, skipped) counts.
+    """
+    conn = connect(db_path)
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime, size, interview_id FROM files")}
+    seen = set()
+    indexed = unchanged = skipped = 0
+
+    with conn:
+        for entry in os.scandir(log_dir):
+            if not LOG_NAME_RE.match(entry.name):
+                continue
+            path = os.path.abspath(entry.path)
+            seen.add(path)
+            stat = entry.stat()
+
+            previous = known.get(path)
+            if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                unchanged += 1
+                continue
+
+            if previous:
+                _delete_interview(conn, previous[2])
+                interview_id = previous[2]
+            else:
+                interview_id = conn.execute("SELECT COALESCE(MAX(interview_id), 0) + 1 FROM files").fetchone()[0]
+
+            try:
+                _index_file(conn, path, interview_id)
+            except Exception as e:
+                # Любой битый лог (не JSON, JSON не той формы) пропускается, остальные индексируются
+                print(f"Skip {path}: {type(e).__name__}: {e}")
+                _delete_interview(conn, interview_id)
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                skipped += 1
+                continue
+
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, stat.st_mtime, stat.st_size, interview_id)
+            )
+            indexed += 1
+
+        removed = 0
+        for path, (_, _, interview_id) in known.items():
+            if path not in seen:
+                _delete_interview(conn, interview_id)
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                removed += 1
+
+    conn.close()
+    return indexed, removed, unchanged, skipped
+
+
+def to_fts_query(query):
+    """Plain user input -> FTS5 query: every term is a quoted phrase ("C++", "BDD/TDD" are not operators)."""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def search(query, field=None, limit=20, db_path=DB_PATH, raw=False):
+    """
+    Full-text search; field restricts matches to turns / skills / gaps / feedback.
+    raw=True passes the query as FTS5 syntax (AND/OR/NEAR, prefix*), otherwise terms are quoted.
+    """
+    if not raw:
+        query = to_fts_query(query)
+    if not query:
+        return []
+    conn = connect(db_path)
+    sql = (
+        "SELECT s.field, s.interview_id, s.turn_id, i.participant_name, i.position, i.grade_target, "
+        "snippet(search, 3, '[', ']', '…', 12) "
+        "FROM search s JOIN interviews i ON i.id = s.interview_id "
+        "WHERE search MATCH ?"
+    )
+    params = [query]
+    if field:
+        sql += " AND s.field = ?"
+        params.append(field)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def stats(position=None, grade=None, db_path=DB_PATH):
+    """Aggregates over interviews filtered by position substring and target grade."""
+    conn = connect(db_path)
+    where, params = [], []
+    if position:
+        where.append("position LIKE ?")
+        params.append(f"%{position}%")
+    if grade:
+        where.append("grade_target = ?")
+        params.append(grade)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+    count, avg_conf, avg_turns = conn.execute(
+        f"SELECT COUNT(*), AVG(confidence_score), AVG(turn_count) FROM interviews {clause}", params
+    ).fetchone()
+    grades = conn.execute(
+        f"SELECT grade, COUNT(*) FROM interviews {clause} GROUP BY grade ORDER BY COUNT(*) DESC", params
+    ).fetchall()
+    top_gaps = conn.execute(
+        f"SELECT gap, COUNT(*) FROM gaps WHERE interview_id IN (SELECT id FROM interviews {clause}) "
+        "GROUP BY gap ORDER BY COUNT(*) DESC LIMIT 10", params
+    ).fetchall()
+    # В старых логах (и во всем текущем архиве) session_meta нет: фильтр по позиции/грейду их не видит
+    without_meta = conn.execute(
+        "SELECT COUNT(*) FROM interviews WHERE position IS NULL AND grade_target IS NULL"
+    ).fetchone()[0]
+    conn.close()
+    return {
+        "interviews": count,
+        "without_meta": without_meta,
+        "avg_confidence": avg_conf,
+        "avg_turns": avg_turns,
+        "grades": grades,
+        "top_gaps": top_gaps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс и поиск по архиву интервью.")
+    parser.add_argument("--db", default=DB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_index = sub.add_parser("index", help="Проиндексировать новые/измененные логи")
+    p_index.add_argument("--logs", default=LOG_DIR)
+
+    p_search = sub.add_parser("search", help="Полнотекстовый поиск")
+    p_search.add_argument("query")
+    p_search.add_argument("--raw", action="store_true", help="Запрос в синтаксисе FTS5 (AND/OR/NEAR, префикс*)")
+    p_search.add_argument("--field", choices=FIELDS)
+    p_search.add_argument("--limit", type=int, default=20)
+
+    p_stats = sub.add_parser("stats", help="Агрегаты по позиции / грейду")
+    p_stats.add_argument("--position")
+    p_stats.add_argument("--grade")
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    if args.command == "index":
+        indexed, removed, unchanged, skipped = index_logs(args.logs, args.db)
+        print(f"Indexed: {indexed}, removed: {removed}, unchanged: {unchanged}, skipped: {skipped}")
+    elif args.command == "search":
+        try:
+            rows = search(args.query, args.field, args.limit, args.db, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            print(f"Некорректный запрос FTS5: {e}. Без --raw слова ищутся как есть.")
+            sys.exit(2)
+        for field, interview_id, turn_id, name, position, grade, snippet in rows:
+            where = f"turn {turn_id}" if turn_id is not None else field
+            print(f"#{interview_id} {name} | {position or '-'} {grade or ''} | {where}: {snippet}")
+    elif args.command == "stats":
+        result = stats(args.position, args.grade, args.db)
+        print(f"Интервью: {result['interviews']}")
+        if (args.position or args.grade) and result["without_meta"]:
+            print(f"Без session_meta (позиция и грейд не записаны, в фильтр не попадают): {result['without_meta']}")
+        if result["avg_confidence"] is not None:
+            print(f"Средняя уверенность: {result['avg_confidence']:.1f}%")
+        if result["avg_turns"] is not None:
+            print(f"Среднее число ходов: {result['avg_turns']:.1f}")
+        print("Грейды: " + ", ".join(f"{g or '?'}={n}" for g, n in result["grades"]))
+        for gap, n in result["top_gaps"]:
+            print(f"  - {gap} ({n})")
+
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 from dotenv import load_dotenv
 load_dotenv(".env")
 
+import argparse
 import json
 import uuid
 from langchain_core.messages import HumanMessage, AIMessage
 from agent.graph import build_graph
+from agent.turn_log import start_log, finalize_log
+from agent.question_bank import serve_opening
+from agent.profiler import TurnProfiler, profile_turn
+
+LOG_PATH = "interview_log.json"
 
 def format_feedback_to_text(feedback_dict):
     """Форматирует словарь фидбэка в читаемый текстовый отчет."""
@@ -55,7 +61,14 @@ def format_feedback_to_text(feedback_dict):
         
     return "\n".join(lines)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Интервью в консоли.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Сэмплирующий профиль каждого хода (CPU / ожидание I/O, folded-стеки) рядом с логом")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
     print("=== Мульти-Агентная Тренировка Интервью ===")
     
     # Сбор информации о кандидате
@@ -74,6 +87,10 @@ def main():
 
     experience = input("Кратко об опыте: ") or "У меня нет опыта. И я уставил это поле "
     
+    # Ходы пишутся в лог своей сессии: лог прошлой сессии (возможно, родитель форков) не перемещается
+    thread_id = str(uuid.uuid4())
+    turn_log_path = f"interview_log.{thread_id}.jsonl"
+
     # Инициализация состояния системы
     initial_state_config = {
         "participant_name": name,
@@ -83,8 +100,8 @@ def main():
             "experience": experience
         },
         "messages": [],
-        "turns": [],
         "current_turn_id": 0,
+        "turn_log_path": turn_log_path,
         "status": "active",
         "mentor_directive": "Начни интервью с представления себя и задай первый релевантный вопрос.",
         "mentor_thoughts": "Начальное состояние.",
@@ -94,13 +111,21 @@ def main():
     }
     
     app = build_graph()
+    start_log(turn_log_path)
+    profiler = TurnProfiler(LOG_PATH) if args.profile else None
     
     first_user_message = input("\nПриветсвие. Введите ваше первое сообщение (или нажмите Enter, чтобы пропустить): ")
     messages = [HumanMessage(content=first_user_message or "Здравствуйте, я готов к интервью.")]
     
-    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    config = {"configurable": {"thread_id": thread_id}}
     initial_state = {**initial_state_config, "messages": messages}
-    current_state = app.invoke(initial_state, config=config)
+    # Стандартное приветствие -> вступление из банка без вызова LLM
+    current_state = None
+    if not first_user_message:
+        current_state = serve_opening(initial_state)
+    if current_state is None:
+        with profile_turn(profiler, "opening"):
+            current_state = app.invoke(initial_state, config=config)
     
     last_msg = current_state["messages"][-1]
     if isinstance(last_msg, AIMessage):
@@ -120,15 +145,13 @@ def main():
         if not user_input.strip():
             continue
             
-        # Поддержка русских и английских команд остановки
-        if user_input.lower() in ["exit", "quit", "stop interview", "стоп", "стоп интервью", "выход", "стоп игра. давай фидбэк."]:
-            pass
-        
+        # Команды остановки (рус/англ) распознаются локально в графе (agent/fast_path.py)
         # Добавляем сообщение пользователя в список сообщений состояния
         current_state["messages"].append(HumanMessage(content=user_input))
         
         # Снова вызываем граф с обновленным состоянием
-        current_state = app.invoke(current_state, config=config)
+        with profile_turn(profiler, f"turn {current_state.get('current_turn_id', 0) + 1}"):
+            current_state = app.invoke(current_state, config=config)
         
         # Проверяем статус
         if current_state.get("status") in ["stop_requested", "finished"]:
@@ -164,18 +187,14 @@ def main():
 
         print("\nПолный отчет сохранен в 'interview_log.json'.")
         
-        # Сохранение в JSON  
-        log_data = {
-            "participant_name": name,
-            "turns": current_state["turns"],
-            "final_feedback": final_output
-        }
-        
-        with open("interview_log.json", "w", encoding="utf-8") as f:
-            json.dump(log_data, f, indent=2, ensure_ascii=False)
-            print("Лог сохранен в interview_log.json")
+        # Сохранение в JSON: ходы уже лежат в JSONL, дописываем фидбэк атомарно
+        finalize_log(turn_log_path, LOG_PATH, name, final_output, current_state.get("session_meta"))
+        print("Лог сохранен в interview_log.json")
     else:
-        print("Отчет не сгенерирован.")
+        print(f"Отчет не сгенерирован. Ходы сохранены в {turn_log_path}")
+    
+    if profiler:
+        profiler.close()
 
 if __name__ == "__main__":
     main()
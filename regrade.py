@@ -0,0 +1,197 @@
+"""
+Пересчет финальных отчетов для архива интервью (logs/interview_log_N.json).
+
+Нужен после изменения FINAL_REPORT_SYSTEM_PROMPT или схемы FinalFeedback: граф не запускается,
+по сохраненным ходам выполняется только стадия отчета (generate_report) с ограниченным параллелизмом.
+Результат пишется рядом с оригиналом в версионированный файл:
+
+    logs/interview_log_N.feedback-<версия>.json
+
+Версия — хэш промптов отчета, схем (FinalFeedback или разделов) и модели. Уже посчитанные файлы текущей версии
+пропускаются, поэтому прерванный прогон можно просто запустить заново:
+
+    python regrade.py                    # все логи, 4 параллельных запроса
+    python regrade.py --workers 8 interview_log_3.json
+    python regrade.py --force            # пересчитать заново
+    python regrade.py --position "Python Developer" --grade Middle   # meta для логов без session_meta
+
+В старых логах нет session_meta. Позиция и грейд тогда берутся из флагов --position / --grade, иначе ищутся
+в первой реплике интервьюера. Если их нет и там, грейд считается неизвестным: в отчет не попадает
+hiring_recommendation (рекомендация по найму имеет смысл только относительно целевого грейда).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Optional, Tuple
+
+LOG_DIR = "./logs"
+LOG_NAME_RE = re.compile(r"^interview_log_(\d+)\.json$")
+DEFAULT_WORKERS = 4
+GRADES = ("Junior", "Middle", "Senior")
+UNKNOWN_POSITION = "не указана"
+UNKNOWN_GRADE = "не указан — оцени фактический уровень кандидата по транскрипту"
+UNKNOWN_EXPERIENCE = "Не указан"
+GRADE_DEPENDENT_FIELDS = ("hiring_recommendation",)
+GRADE_RE = re.compile(r"\b(junior|middle|senior)\b", re.IGNORECASE)
+POSITION_RE = re.compile(r"позици[июя]\s+«?([A-Za-z][\w+#./-]*(?: [A-Za-z][\w+#./-]*){0,3})")
+ARCHIVE_SUMMARY = "Саммари не сохранялось в архиве — опирайся на транскрипт."
+
+
+def report_version() -> str:
+    """Hash of everything that shapes the report: prompts, schemas, model, lean and parallel modes."""
+    from agent.models import FinalFeedback, REPORT_SECTIONS, schema_for
+    from agent.prompts import get_prompt, LEAN_PROMPTS, REPORT_SECTION_INSTRUCTIONS
+    from agent import nodes
+
+    def schema(model_cls):
+        return schema_for(model_cls) if LEAN_PROMPTS else model_cls.model_json_schema()
+
+    if nodes.PARALLEL_REPORT:
+        prompts = [get_prompt("REPORT_CONTEXT_PROMPT"), REPORT_SECTION_INSTRUCTIONS]
+        schemas = {name: schema(cls) for name, cls in REPORT_SECTIONS.items()}
+    else:
+        prompts = [get_prompt("FINAL_REPORT_SYSTEM_PROMPT")]
+        schemas = schema(FinalFeedback)
+    payload = json.dumps({
+        "prompts": prompts,
+        "schemas": schemas,
+        "model": nodes.MODEL_NAME,
+        "lean": LEAN_PROMPTS,
+        "parallel": nodes.PARALLEL_REPORT,
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:10]
+
+
+def output_path(log_path: str, version: str) -> str:
+    return f"{os.path.splitext(log_path)[0]}.feedback-{version}.json"
+
+
+def list_logs(log_dir, only=None):
+    names = sorted(
+        (n for n in os.listdir(log_dir) if LOG_NAME_RE.match(n)),
+        key=lambda n: int(LOG_NAME_RE.match(n).group(1))
+    )
+    if only:
+        names = [n for n in names if n in only]
+    return [os.path.join(log_dir, n) for n in names]
+
+
+def infer_meta(turns) -> Dict[str, str]:
+    """Position / grade named in the interviewer's first message (empty dict if neither is there)."""
+    text = turns[0].get("agent_visible_message", "") if turns else ""
+    meta = {}
+    grade = GRADE_RE.search(text)
+    if grade:
+        meta["grade_target"] = grade.group(1).capitalize()
+    position = POSITION_RE.search(text)
+    if position:
+        meta["position"] = position.group(1).strip()
+    return meta
+
+
+def resolve_meta(data: Dict[str, Any], position: Optional[str], grade: Optional[str]) -> Tuple[Dict[str, str], str]:
+    """
+    session_meta for the report and its source: "log", "cli", "inferred" or "unknown".
+    Nothing is made up: a missing grade stays unknown.
+    """
+    if data.get("session_meta"):
+        return data["session_meta"], "log"
+    inferred = infer_meta(data.get("turns", []))
+    meta = {
+        "position": position or inferred.get("position") or UNKNOWN_POSITION,
+        "grade_target": grade or inferred.get("grade_target") or UNKNOWN_GRADE,
+        "experience": UNKNOWN_EXPERIENCE,
+    }
+    if meta["grade_target"] == UNKNOWN_GRADE:
+        source = "unknown"
+    else:
+        source = "cli" if grade else "inferred"
+    return meta, source
+
+
+def regrade_one(log_path: str, version: str, position: Optional[str] = None, grade: Optional[str] = None):
+    """Runs the reporting stage for one archived interview and writes the versioned result."""
+    from agent.nodes import generate_report
+    from agent.turn_log import write_json_atomic
+
+    with open(log_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    meta, meta_source = resolve_meta(data, position, grade)
+    state = {
+        "participant_name": data.get("participant_name", "Кандидат"),
+        "session_meta": meta,
+        "summary": ARCHIVE_SUMMARY,
+    }
+    # Ключ сессии для очереди лимитера: каждый лог — отдельная "сессия"
+    response, usage = generate_report(state, data.get("turns", []), session=os.path.abspath(log_path))
+    feedback = response.model_dump()
+    omitted = []
+    if meta_source == "unknown":
+        omitted = [field for field in GRADE_DEPENDENT_FIELDS if field in feedback]
+        for field in omitted:
+            del feedback[field]
+    write_json_atomic(output_path(log_path, version), {
+        "source": os.path.basename(log_path),
+        "version": version,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "session_meta": meta,
+        "meta_source": meta_source,
+        "omitted_fields": omitted,
+        "final_feedback": feedback,
+    })
+    return usage, meta_source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет финальных отчетов для архива интервью.")
+    parser.add_argument("--logs", default=LOG_DIR)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Параллельных запросов отчета")
+    parser.add_argument("--force", action="store_true", help="Пересчитать, даже если файл текущей версии есть")
+    parser.add_argument("--position", help="Позиция для логов без session_meta")
+    parser.add_argument("--grade", choices=GRADES, help="Целевой грейд для логов без session_meta")
+    parser.add_argument("logs_only", nargs="*", metavar="LOG", help="Имена логов, например interview_log_1.json")
+    args = parser.parse_args()
+
+    # Режим промптов читается при импорте agent.prompts. Lean-режим не проверен прогоном кассет,
+    # поэтому архивные отчеты всегда считаются полными промптами.
+    os.environ["LEAN_PROMPTS"] = "0"
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+    version = report_version()
+    logs = list_logs(args.logs, set(args.logs_only))
+    todo = [p for p in logs if args.force or not os.path.exists(output_path(p, version))]
+    print(f"Версия отчета: {version}. Логов: {len(logs)}, к пересчету: {len(todo)}, "
+          f"уже готово: {len(logs) - len(todo)}. Параллельно: {args.workers}")
+    if not todo:
+        return
+
+    started = time.perf_counter()
+    done, failed, tokens = 0, 0, 0
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="regrade") as pool:
+        futures = {pool.submit(regrade_one, path, version, args.position, args.grade): path for path in todo}
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            try:
+                usage, meta_source = future.result()
+                done += 1
+                tokens += usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                note = " (грейд неизвестен: без hiring_recommendation)" if meta_source == "unknown" else ""
+                print(f"[ok] {name} -> {os.path.basename(output_path(futures[future], version))}{note}")
+            except Exception as e:
+                failed += 1
+                print(f"[FAIL] {name}: {type(e).__name__}: {e}")
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed * 60 if elapsed else 0.0
+    print(f"Готово: {done}, ошибок: {failed}, {elapsed:.1f}s, {rate:.1f} интервью/мин, токенов: {tokens}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Сценарный прогон графа по транскриптам из logs/ с кассетами LLM/поиска.
+
+Реплики кандидата берутся из interview_log_N.json и по очереди подаются в граф.
+Все вызовы моделей и поиска пишутся в cassettes/interview_log_N.json:
+
+    python replay_scenarios.py --mode record      # один раз, нужен API
+    python replay_scenarios.py                    # офлайн, strict: незаписанный запрос = ошибка
+
+Кассеты в репозиторий не входят: их записывает record-прогон с доступом к API. В strict-режиме сценарий
+без кассеты пропускается ([skip]), а не считается проваленным.
+    python replay_scenarios.py --lean --mode record   # отдельные кассеты для LEAN_PROMPTS=1
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+LOG_DIR = "./logs"
+CASSETTE_DIR = "./cassettes"
+LOG_NAME_RE = re.compile(r"^interview_log_(\d+)\.json$")
+STOP_MESSAGE = "Стоп интервью."
+DEFAULT_META = {"position": "Backend Developer", "grade_target": "Middle", "experience": "Не указан"}
+
+
+def load_scenarios(log_dir, only=None):
+    names = sorted(
+        (n for n in os.listdir(log_dir) if LOG_NAME_RE.match(n)),
+        key=lambda n: int(LOG_NAME_RE.match(n).group(1))
+    )
+    if only:
+        names = [n for n in names if n in only]
+    for name in names:
+        with open(os.path.join(log_dir, name), "r", encoding="utf-8") as f:
+            yield name, json.load(f)
+
+
+def initial_state(data, turn_log_path):
+    """Graph state before the first turn of a logged scenario."""
+    from langchain_core.messages import HumanMessage
+
+    return {
+        "participant_name": data.get("participant_name", "Кандидат"),
+        "session_meta": data.get("session_meta") or DEFAULT_META,
+        "messages": [HumanMessage(content="Здравствуйте, я готов к интервью.")],
+        "current_turn_id": 0,
+        "turn_log_path": turn_log_path,
+        "status": "active",
+        "summary": "Начало интервью.",
+        "mentor_directive": "Начни интервью с представления себя и задай первый релевантный вопрос.",
+        "mentor_thoughts": "Начальное состояние.",
+        "mentor_confidence_score": 100.0,
+        "last_candidate_answer": "",
+        "last_interviewer_question": ""
+    }
+
+
+def candidate_messages(data):
+    """Logged candidate replies in order."""
+    return [turn["user_message"] for turn in data.get("turns", [])]
+
+
+def run_scenario(app, data, turn_log_path):
+    """Feeds the logged candidate messages through the graph, returns the final state."""
+    from langchain_core.messages import HumanMessage
+
+    state = app.invoke(initial_state(data, turn_log_path))
+
+    for message in candidate_messages(data):
+        if state.get("status") in ["stop_requested", "finished"]:
+            break
+        state["messages"].append(HumanMessage(content=message))
+        state = app.invoke(state)
+
+    # Транскрипт мог оборваться без стоп-команды — завершаем явно, чтобы получить отчет
+    if state.get("status") not in ["stop_requested", "finished"]:
+        state["messages"].append(HumanMessage(content=STOP_MESSAGE))
+        state = app.invoke(state)
+    return state
+
+
+def check_result(state):
+    """Scenario passes if the report exists and validates against FinalFeedback."""
+    from agent.models import FinalFeedback
+
+    if not state.get("final_feedback"):
+        return "нет final_feedback (интервью не завершилось)"
+    FinalFeedback.model_validate(json.loads(state["final_feedback"]))
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-прогон сценариев из logs/ на кассетах.")
+    parser.add_argument("--mode", choices=["record", "replay", "strict"], default="strict")
+    parser.add_argument("--logs", default=LOG_DIR)
+    parser.add_argument("--cassettes", default=CASSETTE_DIR)
+    parser.add_argument("--lean", action="store_true", help="Прогон в LEAN_PROMPTS=1 (свои кассеты)")
+    parser.add_argument("scenarios", nargs="*", help="Имена логов, например interview_log_1.json")
+    args = parser.parse_args()
+
+    # Режим промптов читается при импорте agent.prompts
+    os.environ["LEAN_PROMPTS"] = "1" if args.lean else "0"
+    if args.mode == "strict":
+        os.environ.setdefault("API_KEY", "offline-replay")
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
+    from agent.graph import build_graph
+    from agent.cassette import use_cassette
+    from agent.turn_log import close_log
+
+    app = build_graph()
+    suffix = ".lean" if args.lean else ""
+    failed = skipped = 0
+    started = time.perf_counter()
+
+    for name, data in load_scenarios(args.logs, set(args.scenarios)):
+        cassette_path = os.path.join(args.cassettes, name.replace(".json", f"{suffix}.json"))
+        if args.mode == "strict" and not os.path.exists(cassette_path):
+            skipped += 1
+            print(f"[skip] {name}: нет кассеты {cassette_path}")
+            continue
+        scenario_start = time.perf_counter()
+        error = None
+        with tempfile.TemporaryDirectory() as tmp, use_cassette(cassette_path, args.mode) as cassette:
+            turn_log_path = os.path.join(tmp, "turns.jsonl")
+            try:
+                state = run_scenario(app, data, turn_log_path)
+                error = check_result(state)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                close_log(turn_log_path)
+
+        status = "FAIL" if error else "ok"
+        failed += bool(error)
+        print(f"[{status}] {name}: {time.perf_counter() - scenario_start:.2f}s, "
+              f"cassette hits={cassette.hits} live={cassette.misses}" + (f" — {error}" if error else ""))
+
+    print(f"Всего: {time.perf_counter() - started:.2f}s, провалено: {failed}, пропущено без кассеты: {skipped}")
+    if skipped:
+        print("Кассеты записываются один раз с доступом к API: python replay_scenarios.py --mode record")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
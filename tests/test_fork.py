@@ -0,0 +1,50 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.fork import fork_session
+from agent.graph import build_graph
+from agent.turn_log import append_turn, close_log, start_log
+
+
+def initial_state(turn_log_path, opening):
+    return {
+        "participant_name": "Кандидат",
+        "session_meta": {"position": "Python Developer", "grade_target": "Junior", "experience": "1 год"},
+        "messages": [HumanMessage(content=opening), AIMessage(content="Расскажите о GIL.")],
+        "current_turn_id": 0,
+        "turn_log_path": turn_log_path,
+        "status": "active",
+        "summary": "Начало интервью.",
+        "last_interviewer_question": "Расскажите о GIL.",
+    }
+
+
+def test_fork_replays_opening_and_supports_fast_path_turns(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    start_log(path)
+    app = build_graph()
+    state = initial_state(path, "Добрый день, начнем?")
+    # Оба хода — fast path (пустой ответ и off-topic): без вызовов LLM
+    for answer in ["", "как дела?"]:
+        state["messages"].append(HumanMessage(content=answer))
+        state = app.invoke(state)
+
+    branch = fork_session(state, turn_id=3)
+    close_log(branch["turn_log_path"])
+    close_log(path)
+
+    assert branch["messages"][0].content == "Добрый день, начнем?"
+    assert branch["current_turn_id"] == 2
+    assert branch["last_interviewer_question"] == "Расскажите о GIL."
+
+
+def test_fork_after_stop_is_rejected(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    start_log(path)
+    state = initial_state(path, "Здравствуйте")
+    state["messages"].append(HumanMessage(content="стоп"))
+    state = {**state, "status": "stop_requested", "current_turn_id": 1}
+    append_turn(path, {"turn_id": 1, "agent_visible_message": "Расскажите о GIL.", "user_message": "стоп"})
+    with pytest.raises(ValueError, match="остановлена"):
+        fork_session(state, turn_id=2)
+    close_log(path)
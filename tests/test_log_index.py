@@ -0,0 +1,22 @@
+import json
+import os
+import shutil
+
+from log_index import index_logs, search
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), "..", "logs")
+
+
+def test_malformed_log_is_skipped_without_aborting_the_run(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    shutil.copy(os.path.join(LOG_DIR, "interview_log_1.json"), logs / "interview_log_1.json")
+    # Валидный JSON, но верхний уровень — список: .get падает с AttributeError
+    (logs / "interview_log_2.json").write_text(json.dumps([{"turn_id": 1}]), encoding="utf-8")
+    (logs / "interview_log_3.json").write_text("{not json", encoding="utf-8")
+    db = str(tmp_path / "index.sqlite")
+
+    assert index_logs(str(logs), db) == (1, 0, 0, 2)
+    # Битые файлы не попали в files и пробуются снова, валидный не переиндексируется
+    assert index_logs(str(logs), db) == (0, 0, 1, 2)
+    assert search("Kubernetes", db_path=db)
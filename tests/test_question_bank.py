@@ -0,0 +1,28 @@
+from agent.question_bank import MAX_USES, QuestionBank, bank_key
+from agent.turn_log import write_json_atomic
+
+
+def test_take_rotates_through_every_opening(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.json"))
+    texts = [f"q{i}" for i in range(4)]
+    bank.add("Python Developer", "Junior", texts)
+
+    served = [bank.take("Python Developer", "Junior") for _ in range(len(texts) * MAX_USES)]
+
+    # Каждое вступление выдано ровно MAX_USES раз, и выбывание не сбивает ротацию
+    assert sorted(served) == sorted(texts * MAX_USES)
+    assert bank.take("Python Developer", "Junior") is None
+
+
+def test_take_does_not_skip_after_retirement(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.json"))
+    bank.add("Python Developer", "Junior", ["a", "b", "c"])
+    first = bank.existing("Python Developer", "Junior")
+    # Первое вступление почти выработано: следующая выдача выводит его из ротации
+    data = bank._load()
+    data[bank_key("Python Developer", "Junior")]["openings"][0]["uses"] = MAX_USES - 1
+    write_json_atomic(bank.path, data)
+
+    assert bank.take("Python Developer", "Junior") == first[0]
+    assert bank.take("Python Developer", "Junior") == first[1]
+    assert bank.take("Python Developer", "Junior") == first[2]
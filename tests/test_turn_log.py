@@ -0,0 +1,71 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent import nodes
+from agent.graph import build_graph
+from agent.models import FinalFeedback
+from agent.turn_log import append_turn, close_log, read_turns, start_log
+
+FEEDBACK = FinalFeedback(
+    grade="Junior", hiring_recommendation="No Hire", confidence_score=50, confirmed_skills=[], knowledge_gaps=[],
+    gap_solutions=[], soft_skills_clarity="-", soft_skills_honesty="-", soft_skills_engagement="-", personal_roadmap=[]
+)
+
+
+def initial_state(turn_log_path):
+    return {
+        "participant_name": "Кандидат",
+        "session_meta": {"position": "Python Developer", "grade_target": "Junior", "experience": "1 год"},
+        "messages": [HumanMessage(content="Здравствуйте"), AIMessage(content="Расскажите о GIL."),
+                     HumanMessage(content="стоп")],
+        "current_turn_id": 0,
+        "turn_log_path": turn_log_path,
+        "status": "active",
+        "summary": "Начало интервью.",
+        "last_interviewer_question": "Расскажите о GIL.",
+    }
+
+
+def test_read_turns_keeps_last_record_per_turn(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    start_log(path)
+    append_turn(path, {"turn_id": 1, "user_message": "ans1"})
+    append_turn(path, {"turn_id": 1, "user_message": "ans1 (retry)"})
+    append_turn(path, {"turn_id": 2, "user_message": "ans2"})
+    close_log(path)
+    assert [(t["turn_id"], t["user_message"]) for t in read_turns(path)] == [(1, "ans1 (retry)"), (2, "ans2")]
+
+
+def test_retried_turn_is_logged_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl")
+    start_log(path)
+    graded = []
+
+    def flaky_report(state, turns=None):
+        # Ход уже записан logger_node, отчет падает — как упавший воркер на первой попытке
+        if not graded:
+            graded.append(None)
+            raise RuntimeError("provider error")
+        graded.append([t["turn_id"] for t in nodes.session_turns(state)])
+        return FEEDBACK, {}
+
+    monkeypatch.setattr(nodes, "generate_report", flaky_report)
+    app = build_graph()
+    state = initial_state(path)
+    with pytest.raises(RuntimeError):
+        app.invoke(dict(state))
+    # Повтор с последнего сохраненного состояния
+    result = app.invoke(dict(state))
+    close_log(path)
+
+    assert result["status"] == "finished"
+    assert [t["turn_id"] for t in read_turns(path)] == [1]
+    assert graded[-1] == [1]
+
+
+def test_graph_rejects_state_without_turn_log():
+    state = initial_state(None)
+    with pytest.raises(ValueError, match="turn_log_path"):
+        build_graph().invoke(state)
+    with pytest.raises(ValueError, match="turn_log_path"):
+        nodes.session_turns({**state, "last_turn": {"turn_id": 1}})